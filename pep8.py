@@ -50,17 +50,31 @@ __version__ = '1.4.7a0'
 import os
 import sys
 import re
+import bisect
 import time
+import json
+import signal
+import socket
+import hashlib
+import subprocess
 import inspect
 import keyword
+import operator
 import tokenize
 from optparse import OptionParser
-from fnmatch import fnmatch
+from fnmatch import translate
+from stat import S_ISSOCK
 try:
     from configparser import RawConfigParser
-    from io import TextIOWrapper
+    from io import StringIO, TextIOWrapper
 except ImportError:
     from ConfigParser import RawConfigParser
+    from StringIO import StringIO
+try:
+    import multiprocessing
+    import multiprocessing.dummy
+except ImportError:     # Jython
+    multiprocessing = None
 
 DEFAULT_EXCLUDE = '.svn,CVS,.bzr,.hg,.git,__pycache__'
 DEFAULT_IGNORE = 'E123,E226,E24'
@@ -72,6 +86,10 @@ else:
 PROJECT_CONFIG = ('setup.cfg', 'tox.ini', '.pep8')
 TESTSUITE_PATH = os.path.join(os.path.dirname(__file__), 'testsuite')
 MAX_LINE_LENGTH = 79
+CACHE_MAX_SIZE = 64 * 1024 * 1024
+SKIP_BLOCK_SIZE = 4096
+WATCH_INTERVAL = 1.0
+SERVE_TIMEOUT = 10.0
 REPORT_FORMAT = {
     'default': '%(path)s:%(row)d:%(col)d: %(code)s %(text)s',
     'pylint': '%(path)s:%(row)d: [%(code)s] %(text)s',
@@ -86,9 +104,15 @@ WS_OPTIONAL_OPERATORS = ARITHMETIC_OP.union(['^', '&', '|', '<<', '>>', '%'])
 WS_NEEDED_OPERATORS = frozenset([
     '**=', '*=', '/=', '//=', '+=', '-=', '!=', '<>', '<', '>',
     '%=', '^=', '&=', '|=', '==', '<=', '>=', '<<=', '>>=', '='])
+SPACED_OPERATORS = (WS_NEEDED_OPERATORS | UNARY_OPERATORS |
+                    WS_OPTIONAL_OPERATORS)
 WHITESPACE = frozenset(' \t')
 SKIP_TOKENS = frozenset([tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE,
                          tokenize.INDENT, tokenize.DEDENT])
+# The arguments of the physical checks which are set without the tokenizer
+PHYSICAL_ONLY_ARGUMENTS = frozenset([
+    'physical_line', 'line_number', 'lines', 'indent_char', 'filename',
+    'max_line_length', 'hang_closing', 'verbose'])
 BENCHMARK_KEYS = ['directories', 'files', 'logical lines', 'physical lines']
 
 INDENT_REGEX = re.compile(r'([ \t]*)')
@@ -104,7 +128,13 @@ COMPARE_TYPE_REGEX = re.compile(r'(?:[=!]=|is(?:\s+not)?)\s*type(?:s.\w+Type'
 KEYWORD_REGEX = re.compile(r'(\s*)\b(?:%s)\b(\s*)' % r'|'.join(KEYWORDS))
 OPERATOR_REGEX = re.compile(r'(?:[^,\s])(\s*)(?:[-+*/|!<=>%&^]+)(\s*)')
 LAMBDA_REGEX = re.compile(r'\blambda\b')
+BRACKET_OR_COLON_REGEX = re.compile(r'[][(){}:]')
 HUNK_REGEX = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@.*$')
+HUNK_SIZES_REGEX = re.compile(r'^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+GIT_ESCAPE_REGEX = re.compile(r'\\([0-7]{3}|.)')
+GIT_ESCAPES = {'a': '\a', 'b': '\b', 't': '\t', 'n': '\n', 'v': '\v',
+               'f': '\f', 'r': '\r', '"': '"', '\\': '\\'}
+CACHE_ENTRY_REGEX = re.compile(r'[0-9a-f]{40}(?:\.\d+\.tmp)?$')
 
 # Work around Python < 2.6 behaviour, which does not generate NL after
 # a comment which is on a line by itself.
@@ -342,16 +372,27 @@ def missing_whitespace(logical_line):
     E231: [{'a':'b'}]
     """
     line = logical_line
+    # Track the brackets in a single pass, instead of counting them in
+    # the whole prefix of the line for each separator.
+    brackets = 0
+    last_bracket = last_brace = -1
     for index in range(len(line) - 1):
         char = line[index]
-        if char in ',;:' and line[index + 1] not in WHITESPACE:
-            before = line[:index]
-            if char == ':' and before.count('[') > before.count(']') and \
-                    before.rfind('{') < before.rfind('['):
+        if char in ',;:':
+            if line[index + 1] in WHITESPACE:
+                continue
+            if char == ':' and brackets > 0 and last_brace < last_bracket:
                 continue  # Slice syntax, no space required
             if char == ',' and line[index + 1] == ')':
                 continue  # Allow tuple with only one element: (3,)
             yield index, "E231 missing whitespace after '%s'" % char
+        elif char == '[':
+            brackets += 1
+            last_bracket = index
+        elif char == ']':
+            brackets -= 1
+        elif char == '{':
+            last_brace = index
 
 
 def indentation(logical_line, previous_logical, indent_char,
@@ -422,10 +463,12 @@ def continued_indentation(logical_line, tokens, indent_level, hang_closing,
     row = depth = 0
     # remember how many brackets were opened on each line
     parens = [0] * nrows
+    # rows of the brackets which are still open, one per depth
+    open_rows = []
     # relative indents of physical lines
     rel_indent = [0] * nrows
     # visual indents
-    indent_chances = {}
+    indent_chances = IndentChances()
     last_indent = tokens[0][2]
     indent = [last_indent[1]]
     if verbose >= 3:
@@ -451,9 +494,7 @@ def continued_indentation(logical_line, tokens, indent_level, hang_closing,
             if depth:
                 # a bracket expression in a continuation line.
                 # find the line that it was opened on
-                for open_row in range(row - 1, -1, -1):
-                    if parens[open_row]:
-                        break
+                open_row = open_rows[-1]
             else:
                 # an unbracketed continuation line (ie, backslash)
                 open_row = 0
@@ -520,6 +561,7 @@ def continued_indentation(logical_line, tokens, indent_level, hang_closing,
                 depth += 1
                 indent.append(0)
                 parens[row] += 1
+                open_rows.append(row)
                 if verbose >= 4:
                     print("bracket depth %s seen, col %s, visual min = %s" %
                           (depth, start[1], indent[depth]))
@@ -529,17 +571,13 @@ def continued_indentation(logical_line, tokens, indent_level, hang_closing,
                 for d in range(depth):
                     if indent[d] > prev_indent:
                         indent[d] = 0
-                for ind in list(indent_chances):
-                    if ind >= prev_indent:
-                        del indent_chances[ind]
+                indent_chances.truncate(prev_indent)
                 depth -= 1
                 if depth:
                     indent_chances[indent[depth]] = True
-                for idx in range(row, -1, -1):
-                    if parens[idx]:
-                        parens[idx] -= 1
-                        rel_indent[row] = rel_indent[idx]
-                        break
+                idx = open_rows.pop()
+                parens[idx] -= 1
+                rel_indent[row] = rel_indent[idx]
             assert len(indent) == depth + 1
             if start[1] not in indent_chances:
                 # allow to line up tokens
@@ -552,40 +590,6 @@ def continued_indentation(logical_line, tokens, indent_level, hang_closing,
                "itself from next logical line")
 
 
-def whitespace_before_parameters(logical_line, tokens):
-    """
-    Avoid extraneous whitespace in the following situations:
-
-    - Immediately before the open parenthesis that starts the argument
-      list of a function call.
-
-    - Immediately before the open parenthesis that starts an indexing or
-      slicing.
-
-    Okay: spam(1)
-    E211: spam (1)
-
-    Okay: dict['key'] = list[index]
-    E211: dict ['key'] = list[index]
-    E211: dict['key'] = list [index]
-    """
-    prev_type, prev_text, __, prev_end, __ = tokens[0]
-    for index in range(1, len(tokens)):
-        token_type, text, start, end, __ = tokens[index]
-        if (token_type == tokenize.OP and
-            text in '([' and
-            start != prev_end and
-            (prev_type == tokenize.NAME or prev_text in '}])') and
-            # Syntax "class A (B):" is allowed, but avoid it
-            (index < 2 or tokens[index - 2][1] != 'class') and
-                # Allow "return (a.foo for a in range(5))"
-                not keyword.iskeyword(prev_text)):
-            yield prev_end, "E211 whitespace before '%s'" % text
-        prev_type = token_type
-        prev_text = text
-        prev_end = end
-
-
 def whitespace_around_operator(logical_line):
     r"""
     Avoid extraneous whitespace in the following situations:
@@ -613,103 +617,6 @@ def whitespace_around_operator(logical_line):
             yield match.start(2), "E222 multiple spaces after operator"
 
 
-def missing_whitespace_around_operator(logical_line, tokens):
-    r"""
-    - Always surround these binary operators with a single space on
-      either side: assignment (=), augmented assignment (+=, -= etc.),
-      comparisons (==, <, >, !=, <>, <=, >=, in, not in, is, is not),
-      Booleans (and, or, not).
-
-    - Use spaces around arithmetic operators.
-
-    Okay: i = i + 1
-    Okay: submitted += 1
-    Okay: x = x * 2 - 1
-    Okay: hypot2 = x * x + y * y
-    Okay: c = (a + b) * (a - b)
-    Okay: foo(bar, key='word', *args, **kwargs)
-    Okay: alpha[:-i]
-
-    E225: i=i+1
-    E225: submitted +=1
-    E225: x = x /2 - 1
-    E225: z = x **y
-    E226: c = (a+b) * (a-b)
-    E226: hypot2 = x*x + y*y
-    E227: c = a|b
-    E228: msg = fmt%(errno, errmsg)
-    """
-    parens = 0
-    need_space = False
-    prev_type = tokenize.OP
-    prev_text = prev_end = None
-    for token_type, text, start, end, line in tokens:
-        if token_type in (tokenize.NL, tokenize.NEWLINE, tokenize.ERRORTOKEN):
-            # ERRORTOKEN is triggered by backticks in Python 3
-            continue
-        if text in ('(', 'lambda'):
-            parens += 1
-        elif text == ')':
-            parens -= 1
-        if need_space:
-            if start != prev_end:
-                # Found a (probably) needed space
-                if need_space is not True and not need_space[1]:
-                    yield (need_space[0],
-                           "E225 missing whitespace around operator")
-                need_space = False
-            elif text == '>' and prev_text in ('<', '-'):
-                # Tolerate the "<>" operator, even if running Python 3
-                # Deal with Python 3's annotated return value "->"
-                pass
-            else:
-                if need_space is True or need_space[1]:
-                    # A needed trailing space was not found
-                    yield prev_end, "E225 missing whitespace around operator"
-                else:
-                    code, optype = 'E226', 'arithmetic'
-                    if prev_text == '%':
-                        code, optype = 'E228', 'modulo'
-                    elif prev_text not in ARITHMETIC_OP:
-                        code, optype = 'E227', 'bitwise or shift'
-                    yield (need_space[0], "%s missing whitespace "
-                           "around %s operator" % (code, optype))
-                need_space = False
-        elif token_type == tokenize.OP and prev_end is not None:
-            if text == '=' and parens:
-                # Allow keyword args or defaults: foo(bar=None).
-                pass
-            elif text in WS_NEEDED_OPERATORS:
-                need_space = True
-            elif text in UNARY_OPERATORS:
-                # Check if the operator is being used as a binary operator
-                # Allow unary operators: -123, -x, +1.
-                # Allow argument unpacking: foo(*args, **kwargs).
-                if prev_type == tokenize.OP:
-                    binary_usage = (prev_text in '}])')
-                elif prev_type == tokenize.NAME:
-                    binary_usage = (prev_text not in KEYWORDS)
-                else:
-                    binary_usage = (prev_type not in SKIP_TOKENS)
-
-                if binary_usage:
-                    need_space = None
-            elif text in WS_OPTIONAL_OPERATORS:
-                need_space = None
-
-            if need_space is None:
-                # Surrounding space is optional, but ensure that
-                # trailing space matches opening space
-                need_space = (prev_end, start != prev_end)
-            elif need_space and start == prev_end:
-                # A needed opening space was not found
-                yield prev_end, "E225 missing whitespace around operator"
-                need_space = False
-        prev_type = token_type
-        prev_text = text
-        prev_end = end
-
-
 def whitespace_around_comma(logical_line):
     r"""
     Avoid extraneous whitespace in the following situations:
@@ -732,71 +639,6 @@ def whitespace_around_comma(logical_line):
             yield found, "E241 multiple spaces after '%s'" % m.group()[0]
 
 
-def whitespace_around_named_parameter_equals(logical_line, tokens):
-    """
-    Don't use spaces around the '=' sign when used to indicate a
-    keyword argument or a default parameter value.
-
-    Okay: def complex(real, imag=0.0):
-    Okay: return magic(r=real, i=imag)
-    Okay: boolean(a == b)
-    Okay: boolean(a != b)
-    Okay: boolean(a <= b)
-    Okay: boolean(a >= b)
-
-    E251: def complex(real, imag = 0.0):
-    E251: return magic(r = real, i = imag)
-    """
-    parens = 0
-    no_space = False
-    prev_end = None
-    message = "E251 unexpected spaces around keyword / parameter equals"
-    for token_type, text, start, end, line in tokens:
-        if no_space:
-            no_space = False
-            if start != prev_end:
-                yield (prev_end, message)
-        elif token_type == tokenize.OP:
-            if text == '(':
-                parens += 1
-            elif text == ')':
-                parens -= 1
-            elif parens and text == '=':
-                no_space = True
-                if start != prev_end:
-                    yield (prev_end, message)
-        prev_end = end
-
-
-def whitespace_before_inline_comment(logical_line, tokens):
-    """
-    Separate inline comments by at least two spaces.
-
-    An inline comment is a comment on the same line as a statement.  Inline
-    comments should be separated by at least two spaces from the statement.
-    They should start with a # and a single space.
-
-    Okay: x = x + 1  # Increment x
-    Okay: x = x + 1    # Increment x
-    E261: x = x + 1 # Increment x
-    E262: x = x + 1  #Increment x
-    E262: x = x + 1  #  Increment x
-    """
-    prev_end = (0, 0)
-    for token_type, text, start, end, line in tokens:
-        if token_type == tokenize.COMMENT:
-            if not line[:start[1]].strip():
-                continue
-            if prev_end[0] == start[0] and start[1] < prev_end[1] + 2:
-                yield (prev_end,
-                       "E261 at least two spaces before inline comment")
-            symbol, sp, comment = text.partition(' ')
-            if symbol not in ('#', '#:') or comment[:1].isspace():
-                yield start, "E262 inline comment should start with '# '"
-        elif token_type != tokenize.NL:
-            prev_end = end
-
-
 def imports_on_separate_lines(logical_line):
     r"""
     Imports should usually be on separate lines.
@@ -845,15 +687,32 @@ def compound_statements(logical_line):
     """
     line = logical_line
     last_char = len(line) - 1
-    found = line.find(':')
-    while -1 < found < last_char:
-        before = line[:found]
-        if (before.count('{') <= before.count('}') and  # {'a': 1} (dict)
-            before.count('[') <= before.count(']') and  # [1:2] (slice)
-            before.count('(') <= before.count(')') and  # (Python 3 annotation)
-                not LAMBDA_REGEX.search(before)):       # lambda x: x
-            yield found, "E701 multiple statements on one line (colon)"
-        found = line.find(':', found + 1)
+    # Track the brackets in a single pass, instead of counting them in
+    # the whole prefix of the line for each colon.
+    braces = brackets = parens = 0
+    match = LAMBDA_REGEX.search(line)
+    lambda_end = match.end() if match else len(line)
+    for match in BRACKET_OR_COLON_REGEX.finditer(line, 0, last_char):
+        char = match.group()
+        if char == ':':
+            found = match.start()
+            if (braces <= 0 and         # {'a': 1} (dict)
+                brackets <= 0 and       # [1:2] (slice)
+                parens <= 0 and         # (Python 3 annotation)
+                    found < lambda_end):  # lambda x: x
+                yield found, "E701 multiple statements on one line (colon)"
+        elif char == '{':
+            braces += 1
+        elif char == '}':
+            braces -= 1
+        elif char == '[':
+            brackets += 1
+        elif char == ']':
+            brackets -= 1
+        elif char == '(':
+            parens += 1
+        else:
+            parens -= 1
     found = line.find(';')
     while -1 < found:
         if found < last_char:
@@ -879,6 +738,9 @@ def explicit_line_join(logical_line, tokens):
     Okay: aaa = ("bbb "\n       "ccc")
     Okay: aaa = "bbb " \\n    "ccc"
     """
+    if tokens[0][2][0] == tokens[-1][3][0]:
+        # A single row has no backslash to report
+        return
     prev_start = prev_end = parens = 0
     for token_type, text, start, end, line in tokens:
         if start[0] != prev_start and parens and backslash:
@@ -1009,87 +871,319 @@ def python_3000_backticks(logical_line):
         yield pos, "W604 backticks are deprecated, use 'repr()'"
 
 
+# Patterns for the fused scan: each one matches the logical lines where the
+# check may report an error, and the check only runs on these lines.
+FUSED_PATTERNS = [
+    (extraneous_whitespace, EXTRANEOUS_WHITESPACE_REGEX.pattern),
+    (whitespace_around_keywords, r'\s\s|\t'),
+    (whitespace_around_operator, r'\s\s|\t'),
+    (whitespace_around_comma, r'\s\s|\t'),
+    (comparison_to_singleton, r'[=!]=\s*(?:None|False|True)'),
+    (comparison_type, r'type'),
+    (python_3000_has_key, r'\.has_key\('),
+    (python_3000_raise_comma, r'raise\s+\w+\s*,'),
+    (python_3000_not_equal, r'<>'),
+    (python_3000_backticks, r'`'),
+]
+
+
 ##############################################################################
-# Helper functions
+# Plugins (check functions) for tokens
 ##############################################################################
 
 
-if '' == ''.encode():
-    # Python 2: implicit encoding.
-    def readlines(filename):
-        f = open(filename)
-        try:
-            return f.readlines()
-        finally:
-            f.close()
-    isidentifier = re.compile(r'[a-zA-Z_]\w*').match
-    stdin_get_value = sys.stdin.read
-else:
-    # Python 3
-    def readlines(filename):
-        f = open(filename, 'rb')
-        try:
-            coding, lines = tokenize.detect_encoding(f.readline)
-            f = TextIOWrapper(f, coding, line_buffering=True)
-            return [l.decode(coding) for l in lines] + f.readlines()
-        except (LookupError, SyntaxError, UnicodeError):
-            f.close()
-            # Fall back if files are improperly declared
-            f = open(filename, encoding='latin-1')
-            return f.readlines()
-        finally:
-            f.close()
-    isidentifier = str.isidentifier
+def whitespace_before_parameters(token, tokens, token_index):
+    """
+    Avoid extraneous whitespace in the following situations:
 
-    def stdin_get_value():
-        return TextIOWrapper(sys.stdin.buffer, errors='ignore').read()
-readlines.__doc__ = "    Read the source code."
-noqa = re.compile(r'# no(?:qa|pep8)\b', re.I).search
+    - Immediately before the open parenthesis that starts the argument
+      list of a function call.
 
+    - Immediately before the open parenthesis that starts an indexing or
+      slicing.
 
-def expand_indent(line):
-    r"""
-    Return the amount of indentation.
-    Tabs are expanded to the next multiple of 8.
+    Okay: spam(1)
+    E211: spam (1)
 
-    >>> expand_indent('    ')
-    4
-    >>> expand_indent('\t')
-    8
-    >>> expand_indent('    \t')
-    8
-    >>> expand_indent('       \t')
-    8
-    >>> expand_indent('        \t')
-    16
+    Okay: dict['key'] = list[index]
+    E211: dict ['key'] = list[index]
+    E211: dict['key'] = list [index]
     """
-    if '\t' not in line:
-        return len(line) - len(line.lstrip())
-    result = 0
-    for char in line:
-        if char == '\t':
-            result = result // 8 * 8 + 8
-        elif char == ' ':
-            result += 1
-        else:
-            break
-    return result
+    if not token_index:
+        return
+    prev_type, prev_text, __, prev_end, __ = tokens[token_index - 1]
+    if (token[2] != prev_end and
+        (prev_type == tokenize.NAME or prev_text in '}])') and
+        # Syntax "class A (B):" is allowed, but avoid it
+        (token_index < 2 or tokens[token_index - 2][1] != 'class') and
+            # Allow "return (a.foo for a in range(5))"
+            not keyword.iskeyword(prev_text)):
+        yield prev_end, "E211 whitespace before '%s'" % token[1]
+whitespace_before_parameters.operators = ('(', '[')
+
+
+def missing_whitespace_around_operator(token, tokens, token_index,
+                                       paren_depth, lambda_count):
+    r"""
+    - Always surround these binary operators with a single space on
+      either side: assignment (=), augmented assignment (+=, -= etc.),
+      comparisons (==, <, >, !=, <>, <=, >=, in, not in, is, is not),
+      Booleans (and, or, not).
 
+    - Use spaces around arithmetic operators.
 
-def mute_string(text):
-    """
-    Replace contents with 'xxx' to prevent syntax matching.
+    Okay: i = i + 1
+    Okay: submitted += 1
+    Okay: x = x * 2 - 1
+    Okay: hypot2 = x * x + y * y
+    Okay: c = (a + b) * (a - b)
+    Okay: foo(bar, key='word', *args, **kwargs)
+    Okay: alpha[:-i]
 
-    >>> mute_string('"abc"')
-    '"xxx"'
-    >>> mute_string("'''abc'''")
-    "'''xxx'''"
-    >>> mute_string("r'abc'")
-    "r'xxx'"
+    E225: i=i+1
+    E225: submitted +=1
+    E225: x = x /2 - 1
+    E225: z = x **y
+    E226: c = (a+b) * (a-b)
+    E226: hypot2 = x*x + y*y
+    E227: c = a|b
+    E228: msg = fmt%(errno, errmsg)
     """
-    # String modifiers (e.g. u or r)
-    start = text.index(text[-1]) + 1
-    end = len(text) - 1
+    # ERRORTOKEN is triggered by backticks in Python 3
+    skip = (tokenize.NL, tokenize.NEWLINE, tokenize.ERRORTOKEN)
+    # The token after an operator which needs a space is not checked as an
+    # operator: replay the run of operators which ends with this one
+    first = token_index
+    while True:
+        index = first - 1
+        while index >= 0 and tokens[index][0] in skip:
+            index -= 1
+        if (index < 0 or tokens[index][0] != tokenize.OP or
+                tokens[index][1] not in SPACED_OPERATORS):
+            break
+        first = index
+    if index < 0:
+        prev_type = tokenize.OP
+        prev_text = prev_end = None
+    else:
+        prev_type, prev_text, __, prev_end, __ = tokens[index]
+    # The "=" of the keyword arguments and of the defaults of a lambda
+    parens = paren_depth or lambda_count
+    need_space = False
+    setter = None
+    index = first - 1
+    last = len(tokens) - 1
+    while index < last:
+        index += 1
+        token_type, text, start, end, line = tokens[index]
+        if token_type in skip:
+            continue
+        if need_space:
+            if start != prev_end:
+                # Found a (probably) needed space
+                if (need_space is not True and not need_space[1] and
+                        setter == token_index):
+                    yield (need_space[0],
+                           "E225 missing whitespace around operator")
+                need_space = False
+            elif text == '>' and prev_text in ('<', '-'):
+                # Tolerate the "<>" operator, even if running Python 3
+                # Deal with Python 3's annotated return value "->"
+                pass
+            else:
+                if setter != token_index:
+                    # Reported with the previous operator
+                    pass
+                elif need_space is True or need_space[1]:
+                    # A needed trailing space was not found
+                    yield prev_end, "E225 missing whitespace around operator"
+                else:
+                    code, optype = 'E226', 'arithmetic'
+                    if prev_text == '%':
+                        code, optype = 'E228', 'modulo'
+                    elif prev_text not in ARITHMETIC_OP:
+                        code, optype = 'E227', 'bitwise or shift'
+                    yield (need_space[0], "%s missing whitespace "
+                           "around %s operator" % (code, optype))
+                need_space = False
+        elif token_type == tokenize.OP and prev_end is not None:
+            if text == '=' and parens:
+                # Allow keyword args or defaults: foo(bar=None).
+                pass
+            elif text in WS_NEEDED_OPERATORS:
+                need_space = True
+            elif text in UNARY_OPERATORS:
+                # Check if the operator is being used as a binary operator
+                # Allow unary operators: -123, -x, +1.
+                # Allow argument unpacking: foo(*args, **kwargs).
+                if prev_type == tokenize.OP:
+                    binary_usage = (prev_text in '}])')
+                elif prev_type == tokenize.NAME:
+                    binary_usage = (prev_text not in KEYWORDS)
+                else:
+                    binary_usage = (prev_type not in SKIP_TOKENS)
+
+                if binary_usage:
+                    need_space = None
+            elif text in WS_OPTIONAL_OPERATORS:
+                need_space = None
+            setter = index
+
+            if need_space is None:
+                # Surrounding space is optional, but ensure that
+                # trailing space matches opening space
+                need_space = (prev_end, start != prev_end)
+            elif need_space and start == prev_end:
+                # A needed opening space was not found
+                if index == token_index:
+                    yield prev_end, "E225 missing whitespace around operator"
+                need_space = False
+        if index >= token_index and not need_space:
+            break
+        prev_type = token_type
+        prev_text = text
+        prev_end = end
+missing_whitespace_around_operator.operators = SPACED_OPERATORS
+
+
+def whitespace_around_named_parameter_equals(token, tokens, token_index,
+                                             paren_depth):
+    """
+    Don't use spaces around the '=' sign when used to indicate a
+    keyword argument or a default parameter value.
+
+    Okay: def complex(real, imag=0.0):
+    Okay: return magic(r=real, i=imag)
+    Okay: boolean(a == b)
+    Okay: boolean(a != b)
+    Okay: boolean(a <= b)
+    Okay: boolean(a >= b)
+
+    E251: def complex(real, imag = 0.0):
+    E251: return magic(r = real, i = imag)
+    E251: return magic(r=(real), i = imag)
+    """
+    if paren_depth and 0 < token_index < len(tokens) - 1:
+        message = "E251 unexpected spaces around keyword / parameter equals"
+        prev_end = tokens[token_index - 1][3]
+        if token[2] != prev_end:
+            yield (prev_end, message)
+        if tokens[token_index + 1][2] != token[3]:
+            yield (token[3], message)
+whitespace_around_named_parameter_equals.operators = ('=',)
+
+
+def whitespace_before_inline_comment(token, tokens, token_index):
+    """
+    Separate inline comments by at least two spaces.
+
+    An inline comment is a comment on the same line as a statement.  Inline
+    comments should be separated by at least two spaces from the statement.
+    They should start with a # and a single space.
+
+    Okay: x = x + 1  # Increment x
+    Okay: x = x + 1    # Increment x
+    E261: x = x + 1 # Increment x
+    E262: x = x + 1  #Increment x
+    E262: x = x + 1  #  Increment x
+    """
+    token_type, text, start, end, line = token
+    if not line[:start[1]].strip():
+        return
+    index = token_index - 1
+    while index >= 0 and tokens[index][0] in (tokenize.COMMENT, tokenize.NL):
+        index -= 1
+    prev_end = tokens[index][3] if index >= 0 else (0, 0)
+    if prev_end[0] == start[0] and start[1] < prev_end[1] + 2:
+        yield (prev_end,
+               "E261 at least two spaces before inline comment")
+    symbol, sp, comment = text.partition(' ')
+    if symbol not in ('#', '#:') or comment[:1].isspace():
+        yield start, "E262 inline comment should start with '# '"
+whitespace_before_inline_comment.token_types = (tokenize.COMMENT,)
+
+
+##############################################################################
+# Helper functions
+##############################################################################
+
+
+if '' == ''.encode():
+    # Python 2: implicit encoding.
+    def readlines(filename):
+        f = open(filename)
+        try:
+            return f.readlines()
+        finally:
+            f.close()
+    isidentifier = re.compile(r'[a-zA-Z_]\w*').match
+    stdin_get_value = sys.stdin.read
+else:
+    # Python 3
+    def readlines(filename):
+        f = open(filename, 'rb')
+        try:
+            coding, lines = tokenize.detect_encoding(f.readline)
+            f = TextIOWrapper(f, coding, line_buffering=True)
+            return [l.decode(coding) for l in lines] + f.readlines()
+        except (LookupError, SyntaxError, UnicodeError):
+            f.close()
+            # Fall back if files are improperly declared
+            f = open(filename, encoding='latin-1')
+            return f.readlines()
+        finally:
+            f.close()
+    isidentifier = str.isidentifier
+
+    def stdin_get_value():
+        return TextIOWrapper(sys.stdin.buffer, errors='ignore').read()
+readlines.__doc__ = "    Read the source code."
+noqa = re.compile(r'# no(?:qa|pep8)\b', re.I).search
+
+
+def expand_indent(line):
+    r"""
+    Return the amount of indentation.
+    Tabs are expanded to the next multiple of 8.
+
+    >>> expand_indent('    ')
+    4
+    >>> expand_indent('\t')
+    8
+    >>> expand_indent('    \t')
+    8
+    >>> expand_indent('       \t')
+    8
+    >>> expand_indent('        \t')
+    16
+    """
+    if '\t' not in line:
+        return len(line) - len(line.lstrip())
+    result = 0
+    for char in line:
+        if char == '\t':
+            result = result // 8 * 8 + 8
+        elif char == ' ':
+            result += 1
+        else:
+            break
+    return result
+
+
+def mute_string(text):
+    """
+    Replace contents with 'xxx' to prevent syntax matching.
+
+    >>> mute_string('"abc"')
+    '"xxx"'
+    >>> mute_string("'''abc'''")
+    "'''xxx'''"
+    >>> mute_string("r'abc'")
+    "r'xxx'"
+    """
+    # String modifiers (e.g. u or r)
+    start = text.index(text[-1]) + 1
+    end = len(text) - 1
     # Triple quotes
     if text[-3:] in ('"""', "'''"):
         start += 2
@@ -1097,6 +1191,60 @@ def mute_string(text):
     return text[:start] + 'x' * (end - start) + text[end:]
 
 
+class IndentChances(dict):
+    """
+    Map the columns of the possible visual indents, in sorted order.
+
+    Removing all the columns from a given position costs O(log n) plus
+    the number of removed columns, instead of a scan of the whole map.
+    """
+
+    def __init__(self):
+        super(IndentChances, self).__init__()
+        self._columns = []
+
+    def __setitem__(self, column, value):
+        if column not in self:
+            bisect.insort(self._columns, column)
+        super(IndentChances, self).__setitem__(column, value)
+
+    def truncate(self, column):
+        """Remove the columns greater than or equal to this one."""
+        index = bisect.bisect_left(self._columns, column)
+        for removed in self._columns[index:]:
+            del self[removed]
+        del self._columns[index:]
+
+
+class FusedScanner(object):
+    """
+    Find which of the named patterns match a line.
+
+    The alternation of all the patterns is searched first, and most lines
+    do not match it.  Otherwise each pattern is searched from the first
+    match of the alternation.
+    """
+
+    def __init__(self, patterns):
+        self.names = tuple([name for (name, pattern) in patterns])
+        unique = []
+        for name, pattern in patterns:
+            if pattern not in unique:
+                unique.append(pattern)
+        self._any = re.compile('|'.join(unique))
+        self._regexes = [(name, re.compile(pattern))
+                         for (name, pattern) in patterns]
+
+    def __call__(self, line):
+        """Return the names of the patterns which match the line."""
+        match = self._any.search(line)
+        if match is None:
+            return ()
+        pos = match.start()
+        return [name for (name, regex) in self._regexes
+                if regex.search(line, pos)]
+
+
 def parse_udiff(diff, patterns=None, parent='.'):
     """Return a dictionary of matching lines."""
     # For each file of the diff, the entry key is the filename,
@@ -1122,6 +1270,58 @@ def parse_udiff(diff, patterns=None, parent='.'):
                  if rows and filename_match(path, patterns)])
 
 
+def git_changed_lines(ref, patterns=None, paths=()):
+    """
+    Return a dictionary of the lines added or modified since the git
+    reference, like parse_udiff.
+    """
+    toplevel = _git('rev-parse', '--show-toplevel').rstrip('\n')
+    diff = _git('-c', 'core.quotepath=off', 'diff', '--unified=0',
+                '--no-color', '--no-ext-diff', '--no-prefix',
+                '--diff-filter=ACMR', ref, '--', *paths)
+    parent = os.path.relpath(toplevel)
+    rv = {}
+    path = None
+    lines = diff.splitlines()
+    index, count = 0, len(lines)
+    while index < count:
+        line = lines[index]
+        index += 1
+        if line[:3] == '@@ ':
+            hunk_match = HUNK_SIZES_REGEX.match(line)
+            old_rows, row, nrows = [int(g or '1') for g in hunk_match.groups()]
+            rv[path].update(range(row, row + nrows))
+            # Without context, the hunk contains the old and the new rows
+            index += old_rows + nrows
+        elif line[:4] == '+++ ':
+            path = _git_unquote(line[4:].split('\t', 1)[0])
+            rv[path] = set()
+    return dict([(os.path.join(parent, path), rows)
+                 for (path, rows) in rv.items()
+                 if rows and filename_match(path, patterns)])
+
+
+def _git(*args):
+    """Run a git command and return its output."""
+    process = subprocess.Popen(('git',) + args, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        raise ValueError(stderr.decode('utf-8', 'replace').strip())
+    if isinstance(stdout, str):     # Python 2: keep the file names as bytes
+        return stdout
+    return stdout.decode(sys.getfilesystemencoding(), 'surrogateescape')
+
+
+def _git_unquote(path):
+    """Return the file name of a path quoted by git, like a C string."""
+    if path[:1] != '"':
+        return path
+    return GIT_ESCAPE_REGEX.sub(
+        lambda match: GIT_ESCAPES.get(match.group(1)) or
+        chr(int(match.group(1), 8)), path[1:-1])
+
+
 def filename_match(filename, patterns, default=True):
     """
     Check if patterns contains a pattern that matches filename.
@@ -1129,7 +1329,59 @@ def filename_match(filename, patterns, default=True):
     """
     if not patterns:
         return default
-    return any(fnmatch(filename, pattern) for pattern in patterns)
+    return compile_patterns(patterns)(os.path.normcase(filename)) is not None
+
+
+_compiled_patterns = {}
+
+
+def compile_patterns(patterns):
+    """
+    Translate the shell patterns into a single regular expression, and
+    return its match method.  The result is cached.
+    """
+    patterns = tuple(patterns)
+    if patterns not in _compiled_patterns:
+        regex = '|'.join('(?:%s)' % translate(os.path.normcase(pattern))
+                         for pattern in patterns)
+        _compiled_patterns[patterns] = re.compile(regex).match
+    return _compiled_patterns[patterns]
+
+
+if hasattr(os, 'scandir'):
+    def scan_dir(dirname):
+        """
+        Return the names of the files and of the subdirectories.
+
+        Symbolic links to directories are skipped, like os.walk does.
+        """
+        files, dirs = [], []
+        try:
+            for entry in os.scandir(dirname):
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+        except OSError:
+            pass
+        return files, dirs
+else:
+    def scan_dir(dirname):
+        files, dirs = [], []
+        try:
+            names = os.listdir(dirname)
+        except OSError:
+            return files, dirs
+        for name in names:
+            path = os.path.join(dirname, name)
+            if os.path.isdir(path):
+                if not os.path.islink(path):
+                    dirs.append(name)
+            else:
+                files.append(name)
+        return files, dirs
+    scan_dir.__doc__ = "    Return the names of the files and subdirectories."
 
 
 ##############################################################################
@@ -1137,7 +1389,8 @@ def filename_match(filename, patterns, default=True):
 ##############################################################################
 
 
-_checks = {'physical_line': {}, 'logical_line': {}, 'tree': {}}
+_checks = {'physical_line': {}, 'logical_line': {}, 'token': {},
+           'tree': {}}
 
 
 def register_check(check, codes=None):
@@ -1151,7 +1404,7 @@ def register_check(check, codes=None):
             _checks[kind][check] = (codes or [''], args)
     if inspect.isfunction(check):
         args = inspect.getargspec(check)[0]
-        if args and args[0] in ('physical_line', 'logical_line'):
+        if args and args[0] in ('physical_line', 'logical_line', 'token'):
             if codes is None:
                 codes = ERRORCODE_REGEX.findall(check.__doc__ or '')
             _add_check(check, args[0], codes, args)
@@ -1160,10 +1413,77 @@ def register_check(check, codes=None):
             _add_check(check, 'tree', codes, None)
 
 
+def bind_check(check, argument_names):
+    """
+    Return a function which runs the check with the attributes of a checker.
+
+    The arguments are fetched with a single precompiled getter, instead of
+    one getattr() call per argument name.
+    """
+    getter = operator.attrgetter(*argument_names)
+    if len(argument_names) == 1:
+        return lambda checker: check(getter(checker))
+    return lambda checker: check(*getter(checker))
+
+
+def fuse_check(name, run):
+    """
+    Wrap a bound check to run it only when the fused scan of the logical
+    line found its pattern.
+    """
+    def fused(checker):
+        if name in checker.fused_matches:
+            return run(checker)
+        return ()
+    return fused
+
+
+def collect_token_check(name):
+    """
+    Return a function which gives the results of a token check on the
+    logical line, once the token checks have run.
+    """
+    return lambda checker: checker.token_results.get(name, ())
+
+
+def dispatch_token_checks(runners):
+    """
+    Map each token type, or each operator, to the bound token checks
+    which receive these tokens.
+    """
+    dispatch = {}
+    for name, check, run in runners:
+        keys = getattr(check, 'operators', None)
+        if keys is None:
+            keys = getattr(check, 'token_types', None) or tokenize.tok_name
+        for key in keys:
+            dispatch.setdefault(key, []).append((name, check, run))
+    # The checks of all the OP tokens also receive each operator
+    for key, runners in dispatch.items():
+        if key not in tokenize.tok_name:
+            runners.extend(dispatch.get(tokenize.OP, ()))
+    return dispatch
+
+
+def profile_check(name, run):
+    """
+    Wrap a bound check to record its call count and elapsed time in the
+    report of the checker.
+    """
+    def profiled(checker):
+        start = time.time()
+        result = run(checker)
+        if inspect.isgenerator(result):
+            result = list(result)
+        checker.report.add_timing(name, time.time() - start)
+        return result
+    return profiled
+
+
 def init_checks_registry():
     """
     Register all globally visible functions where the first argument name
-    is 'physical_line' or 'logical_line'.
+    is 'physical_line', 'logical_line' or 'token'.
     """
     mod = inspect.getmodule(register_check)
     for (name, function) in inspect.getmembers(mod, inspect.isfunction):
@@ -1171,6 +1491,20 @@ def init_checks_registry():
 init_checks_registry()
 
 
+class _FileTimeout(Exception):
+    """
+    The checks of a file ran out of their --file-timeout budget.
+
+    It is raised by SIGALRM in the running check.  Where SIGALRM cannot
+    be used, it is raised after a logical line, so a check which stalls
+    on a single logical line is not interrupted.
+    """
+
+
+def _raise_file_timeout(signum, frame):
+    raise _FileTimeout()
+
+
 class Checker(object):
     """
     Load a Python source file, tokenize it, check coding style.
@@ -1183,12 +1517,33 @@ class Checker(object):
         else:
             assert not kwargs
         self._io_error = None
-        self._physical_checks = options.physical_checks
-        self._logical_checks = options.logical_checks
+        if hasattr(options, 'physical_runners'):
+            self._physical_checks = options.physical_runners
+            self._logical_checks = options.logical_runners
+            self._token_dispatch = options.token_dispatch
+        else:
+            # The options were not prepared by a StyleGuide
+            self.bind_checks(options)
         self._ast_checks = options.ast_checks
         self.max_line_length = options.max_line_length
         self.hang_closing = options.hang_closing
         self.verbose = options.verbose
+        self._profile = getattr(options, 'benchmark', False)
+        self._fused_scan = getattr(options, 'fused_scanner', None)
+        self._file_timeout = getattr(options, 'file_timeout', 0)
+        self.timed_out = False
+        ignore_code = getattr(options, 'ignore_code', None)
+        # Without logical checks, the tokens are only needed for E901, and
+        # for the physical checks which use the state of the tokenizer
+        self._physical_only = not (self._logical_checks or
+                                   options.ast_checks or
+                                   ignore_code is None or
+                                   not ignore_code('E901') or
+                                   self.verbose >= 3 or
+                                   [args for (name, check, args)
+                                    in options.physical_checks
+                                    if not PHYSICAL_ONLY_ARGUMENTS.issuperset(
+                                        args)])
         self.filename = filename
         if filename is None:
             self.filename = 'stdin'
@@ -1215,7 +1570,26 @@ class Checker(object):
         self.report = report or options.report
         self.report_error = self.report.error
 
-    def report_invalid_syntax(self):
+    def bind_checks(self, options):
+        """
+        Bind the checks listed in the options, like StyleGuide does.
+        """
+        self._physical_checks = [(name, check, bind_check(check, args))
+                                 for (name, check, args)
+                                 in options.physical_checks]
+        self._logical_checks = [(name, check, bind_check(check, args))
+                                for (name, check, args)
+                                in options.logical_checks]
+        token_runners = [(name, check, bind_check(check, args))
+                         for (name, check, args)
+                         in getattr(options, 'token_checks', ())]
+        self._token_dispatch = dispatch_token_checks(token_runners)
+        for name, check, run in token_runners:
+            self._logical_checks.append(
+                (name, check, collect_token_check(name)))
+        self._logical_checks.sort()
+
+    def report_invalid_syntax(self, line_shift=0):
         exc_type, exc = sys.exc_info()[:2]
         if len(exc.args) > 1:
             offset = exc.args[1]
@@ -1223,11 +1597,43 @@ class Checker(object):
                 offset = offset[1:3]
         else:
             offset = (1, 0)
-        self.report_error(offset[0], offset[1] or 0,
+        self.report_error(offset[0] + line_shift, offset[1] or 0,
                           'E901 %s: %s' % (exc_type.__name__, exc.args[0]),
                           self.report_invalid_syntax)
     report_invalid_syntax.__doc__ = "    Check if the syntax is valid."
 
+    def report_timeout(self, tb):
+        """
+        Report the check which was running when the time budget of the
+        file ran out, at the line it was checking.
+        """
+        running = kind = None
+        while tb is not None:
+            frame = tb.tb_frame
+            # The loops over the checks name the running one
+            if (frame.f_code.co_name in ('check_physical', 'check_logical',
+                                         'check_line_tokens', 'check_ast')
+                    and 'name' in frame.f_locals):
+                running = frame.f_locals['name']
+                kind = frame.f_code.co_name
+            elif running is None and frame.f_globals.get('__name__') == \
+                    'tokenize':
+                running = 'tokenize'
+            tb = tb.tb_next
+        tokens = getattr(self, 'tokens', None)
+        if kind == 'check_ast':
+            line_number = 1
+        elif kind == 'check_physical' or not tokens:
+            line_number = max(self.line_number, 1)
+        else:
+            line_number = tokens[0][2][0]
+        text = ('E903 TimeoutError: checks stopped after %g seconds' %
+                self._file_timeout)
+        if running is not None:
+            text += ' in %s' % running
+        self.timed_out = True
+        self.report_error(line_number, 0, text, self.report_timeout)
+
     def readline(self):
         """
         Get the next line from the input buffer.
@@ -1263,8 +1669,8 @@ class Checker(object):
         self.physical_line = line
         if self.indent_char is None and line[:1] in WHITESPACE:
             self.indent_char = line[0]
-        for name, check, argument_names in self._physical_checks:
-            result = self.run_check(check, argument_names)
+        for name, check, run in self._physical_checks:
+            result = run(self)
             if result is not None:
                 offset, text = result
                 self.report_error(self.line_number, offset, text, check)
@@ -1274,6 +1680,7 @@ class Checker(object):
         Build a logical line from tokens.
         """
         self.mapping = []
+        self.mapping_offsets = []
         logical = []
         comments = []
         length = 0
@@ -1301,6 +1708,7 @@ class Checker(object):
                     logical.append(fill)
                     length += len(fill)
             self.mapping.append((length, token))
+            self.mapping_offsets.append(length)
             logical.append(text)
             length += len(text)
             previous = token
@@ -1313,7 +1721,12 @@ class Checker(object):
         """
         Build a line from tokens and run all logical checks on it.
         """
-        self.build_tokens_line()
+        if self._profile:
+            start = time.time()
+            self.build_tokens_line()
+            self.report.add_timing('build_tokens_line', time.time() - start)
+        else:
+            self.build_tokens_line()
         self.report.increment_logical_line()
         first_line = self.lines[self.mapping[0][1][2][0] - 1]
         indent = first_line[:self.mapping[0][1][2][1]]
@@ -1321,57 +1734,214 @@ class Checker(object):
         self.indent_level = expand_indent(indent)
         if self.verbose >= 2:
             print(self.logical_line[:80].rstrip())
-        for name, check, argument_names in self._logical_checks:
+        if self._fused_scan is not None:
+            self.fused_matches = self._fused_scan(self.logical_line)
+        if self._token_dispatch:
+            self.check_line_tokens()
+        for name, check, run in self._logical_checks:
             if self.verbose >= 4:
                 print('   ' + name)
-            for result in self.run_check(check, argument_names):
+            for result in run(self):
                 offset, text = result
                 if isinstance(offset, tuple):
                     orig_number, orig_offset = offset
                 else:
-                    for token_offset, token in self.mapping:
-                        if offset >= token_offset:
-                            orig_number = token[2][0]
-                            orig_offset = (token[2][1] + offset - token_offset)
+                    # Find the last token which starts before the offset
+                    index = bisect.bisect_right(self.mapping_offsets, offset)
+                    token_offset, token = self.mapping[max(index - 1, 0)]
+                    orig_number = token[2][0]
+                    orig_offset = token[2][1] + offset - token_offset
                 self.report_error(orig_number, orig_offset, text, check)
         self.previous_logical = self.logical_line
 
+    def check_line_tokens(self):
+        """
+        Run the token checks, in a single loop over the tokens of the
+        logical line.
+        """
+        dispatch = self._token_dispatch
+        op_checks = dispatch.get(tokenize.OP)
+        self.token_results = results = {}
+        depth = parens = lambdas = 0
+        for index, token in enumerate(self.tokens):
+            text = None
+            if token[0] == tokenize.OP:
+                text = token[1]
+                checks = dispatch.get(text, op_checks)
+            else:
+                checks = dispatch.get(token[0])
+            if checks:
+                self.token = token
+                self.token_index = index
+                self.bracket_depth = depth
+                self.paren_depth = parens
+                self.lambda_count = lambdas
+                for name, check, run in checks:
+                    for result in run(self) or ():
+                        results.setdefault(name, []).append(result)
+            if text:
+                if text in '([{':
+                    depth += 1
+                    if text == '(':
+                        parens += 1
+                elif text in ')]}':
+                    depth -= 1
+                    if text == ')':
+                        parens -= 1
+            elif token[1] == 'lambda':
+                lambdas += 1
+
     def check_ast(self):
         try:
             tree = compile(''.join(self.lines), '', 'exec', PyCF_ONLY_AST)
         except (SyntaxError, TypeError):
             return self.report_invalid_syntax()
         for name, cls, _ in self._ast_checks:
+            start = time.time()
             checker = cls(tree, self.filename)
             for lineno, offset, text, check in checker.run():
                 if not noqa(self.lines[lineno - 1]):
                     self.report_error(lineno, offset, text, check)
+            if self._profile:
+                self.report.add_timing(name, time.time() - start)
+
+    def generate_tokens(self):
+        if self._io_error:
+            self.report_error(1, 0, 'E902 %s' % self._io_error, readlines)
+        if self._profile:
+            tokengen = self.profile_tokens()
+        else:
+            tokengen = tokenize.generate_tokens(self.readline_check_physical)
+        try:
+            for token in tokengen:
+                yield token
+        except (SyntaxError, tokenize.TokenError):
+            self.report_invalid_syntax()
+
+    def profile_tokens(self):
+        """
+        Generate the tokens and record the time spent in the tokenizer,
+        without the physical checks.
+        """
+        physical_elapsed = [0]
+
+        def readline():
+            start = time.time()
+            line = self.readline_check_physical()
+            physical_elapsed[0] += time.time() - start
+            return line
+        tokengen = tokenize.generate_tokens(readline)
+        while True:
+            physical_elapsed[0] = 0
+            start = time.time()
+            try:
+                token = next(tokengen)
+            except StopIteration:
+                return
+            elapsed = time.time() - start - physical_elapsed[0]
+            self.report.add_timing('tokenize', elapsed)
+            yield token
+
+    def check_all(self, expected=None, line_offset=0):
+        """
+        Run all checks on the input file.
+        """
+        self.report.init_file(self.filename, self.lines, expected, line_offset)
+        checkpoint = None
+        if self.report.max_errors:
+            checkpoint = self.report.limit_reached
+        if self._file_timeout:
+            self._run_checks_timed(checkpoint)
+        else:
+            self._run_checks(checkpoint)
+        return self.report.get_file_results()
+
+    def _run_checks(self, checkpoint):
+        if self._ast_checks:
+            self.check_ast()
+        self.init_checker_state()
+        if self._physical_only:
+            self.check_physical_lines(checkpoint)
+        else:
+            self.check_tokens(self.generate_tokens(), checkpoint)
+
+    def _run_checks_timed(self, checkpoint):
+        """
+        Run the checks, and abandon them when the file takes more than
+        --file-timeout seconds.
+
+        A timer interrupts the running check with SIGALRM.  Without
+        SIGALRM, or outside of the main thread, the time is only checked
+        after each logical line.
+        """
+        timeout = self._file_timeout
+        alarm = False
+        if hasattr(signal, 'setitimer'):
+            try:
+                previous = signal.signal(signal.SIGALRM, _raise_file_timeout)
+                alarm = True
+            except ValueError:
+                pass    # Not in the main thread
+        if not alarm:
+            deadline = time.time() + timeout
+            limit_reached = checkpoint
+
+            def checkpoint():
+                if time.time() > deadline:
+                    raise _FileTimeout()
+                return limit_reached is not None and limit_reached()
+        try:
+            try:
+                if alarm:
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                self._run_checks(checkpoint)
+            finally:
+                if alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                    signal.signal(signal.SIGALRM, previous or signal.SIG_DFL)
+        except _FileTimeout:
+            self.report_timeout(sys.exc_info()[2])
+
+    def check_physical_lines(self, checkpoint=None):
+        """
+        Run the physical checks on all the lines, without tokenizing them.
 
-    def generate_tokens(self):
+        It is used when no logical check is selected.  The checks stop
+        when the checkpoint function returns True after a line.
+        """
         if self._io_error:
             self.report_error(1, 0, 'E902 %s' % self._io_error, readlines)
-        tokengen = tokenize.generate_tokens(self.readline_check_physical)
-        try:
-            for token in tokengen:
-                yield token
-        except (SyntaxError, tokenize.TokenError):
-            self.report_invalid_syntax()
+        check_physical = self.check_physical
+        for line in self.lines:
+            self.line_number += 1
+            check_physical(line)
+            if checkpoint is not None and checkpoint():
+                return
+
+    def init_checker_state(self, line_number=0, indent_char=None,
+                           indent_level=0, previous_logical='',
+                           indent_stack=()):
+        """
+        Prepare the checker to read the line after line_number.
+        """
+        self.line_number = line_number
+        self.indent_char = indent_char
+        self.indent_level = indent_level
+        self.previous_logical = previous_logical
+        self.indent_stack = list(indent_stack)
 
-    def check_all(self, expected=None, line_offset=0):
+    def check_tokens(self, tokengen, checkpoint=None):
         """
-        Run all checks on the input file.
+        Run the logical checks on the tokens.
+
+        The checkpoint function is called after each logical line, and
+        the checks stop when it returns True.  Return True if they were
+        stopped this way; they can resume with the rest of the tokens.
         """
-        self.report.init_file(self.filename, self.lines, expected, line_offset)
-        if self._ast_checks:
-            self.check_ast()
-        self.line_number = 0
-        self.indent_char = None
-        self.indent_level = 0
-        self.previous_logical = ''
         self.tokens = []
         self.blank_lines = blank_lines_before_comment = 0
         parens = 0
-        for token in self.generate_tokens():
+        for token in tokengen:
             self.tokens.append(token)
             token_type, text = token[0:2]
             if self.verbose >= 3:
@@ -1393,6 +1963,8 @@ class Checker(object):
                     self.check_logical()
                     self.tokens = []
                     self.blank_lines = blank_lines_before_comment = 0
+                    if checkpoint is not None and checkpoint():
+                        return True
                 elif token_type == tokenize.NL:
                     if len(self.tokens) == 1:
                         # The physical line contains only this token.
@@ -1405,7 +1977,218 @@ class Checker(object):
                     if COMMENT_WITH_NL:
                         # The comment also ends a physical line
                         self.tokens = []
-        return self.report.get_file_results()
+                elif token_type == tokenize.INDENT:
+                    self.indent_stack.append(text)
+                elif token_type == tokenize.DEDENT:
+                    self.indent_stack.pop()
+
+    def iter_errors(self):
+        """
+        Run all checks on the input file, and generate the errors as they
+        are found, after each logical line.
+
+        The errors are (filename, line_number, column, code, text) tuples.
+        They are reported too, and the report filters them.
+        """
+        report = self.report
+        report.init_file(self.filename, self.lines, None, 0)
+        found = []
+
+        def record_error(line_number, offset, text, check):
+            code = report.error(line_number, offset, text, check)
+            if code:
+                found.append((self.filename, line_number, offset + 1,
+                              code, text[5:]))
+            return code
+        self.report_error = record_error
+        try:
+            if self._ast_checks:
+                self.check_ast()
+            self.init_checker_state()
+            tokengen = self.generate_tokens()
+            stopped = True
+            while stopped:
+                stopped = self.check_tokens(tokengen, found.__len__)
+                for error in found:
+                    yield error
+                del found[:]
+        finally:
+            self.report_error = report.error
+        report.get_file_results()
+
+    def resume_tokens(self):
+        """
+        Generate the tokens from the line after self.line_number.
+
+        A few lines are fed to the tokenizer before the real lines to
+        restore its stack of indentation levels, and their tokens are
+        dropped.
+        """
+        if self.indent_stack:
+            prefix = ['%sif 1:\n' % indent
+                      for indent in [''] + self.indent_stack[:-1]]
+            prefix.append('%spass\n' % self.indent_stack[-1])
+        else:
+            prefix = []
+        skip = len(prefix)
+        shift = self.line_number - skip
+        prefix.reverse()
+
+        def readline():
+            if prefix:
+                return prefix.pop()
+            return self.readline_check_physical()
+        try:
+            for token in tokenize.generate_tokens(readline):
+                if token[2][0] > skip:
+                    yield (token[0], token[1],
+                           (token[2][0] + shift, token[2][1]),
+                           (token[3][0] + shift, token[3][1]), token[4])
+        except (SyntaxError, tokenize.TokenError):
+            self.report_invalid_syntax(shift)
+
+    def save_checkpoint(self, errors):
+        """
+        Return the state of the checker after a logical line.
+        """
+        return (self.line_number, len(errors), self.indent_char,
+                self.indent_level, self.previous_logical,
+                tuple(self.indent_stack))
+
+    def recheck(self, lines, changed_ranges=None, previous_state=None):
+        """
+        Run all checks on a new version of the lines, and return a
+        CheckerState to pass to the next call.
+
+        The changed_ranges are (first, last) line numbers of the edited
+        lines, in the new lines.  When they are not given, they are
+        found by comparing the lines with the previous state.
+
+        The checks resume after the last logical line before the first
+        change, and stop at the first logical line after the last change
+        where the state of the checker is the same as in the previous
+        run.  The results of the previous run are reused for the other
+        lines.
+        """
+        self.lines = lines
+        report = self.report
+        report.init_file(self.filename, lines, None, 0)
+        errors = []
+        checkpoints = []
+
+        def record_error(line_number, offset, text, check):
+            errors.append((line_number, offset, text, check))
+            return report.error(line_number, offset, text, check)
+        self.report_error = record_error
+        try:
+            if previous_state is None or self._ast_checks:
+                self._check_all_state(errors, checkpoints)
+            else:
+                self._recheck_state(previous_state, changed_ranges,
+                                    errors, checkpoints)
+        finally:
+            self.report_error = report.error
+        report.get_file_results()
+        return CheckerState(lines, checkpoints, errors)
+
+    def _check_all_state(self, errors, checkpoints):
+        if self._ast_checks:
+            self.check_ast()
+        self.init_checker_state()
+
+        def checkpoint():
+            checkpoints.append(self.save_checkpoint(errors))
+        self.check_tokens(self.generate_tokens(), checkpoint)
+
+    def _recheck_state(self, previous, changed_ranges, errors, checkpoints):
+        lines = self.lines
+        old_lines = previous.lines
+        delta = len(lines) - len(old_lines)
+        if changed_ranges:
+            first = min([start for (start, end) in changed_ranges])
+            last = max([end for (start, end) in changed_ranges])
+        else:
+            size = min(len(lines), len(old_lines))
+            first = 0
+            while first < size and lines[first] == old_lines[first]:
+                first += 1
+            last = len(lines)
+            while (last > first and last - delta > first and
+                   lines[last - 1] == old_lines[last - delta - 1]):
+                last -= 1
+            first += 1
+        rows = previous.rows
+        old_checkpoints = previous.checkpoints
+        # The last line may have errors which depend on the line count
+        restart = bisect.bisect_left(
+            rows, min(first, len(lines), len(old_lines))) - 1
+        if restart < 0:
+            self.init_checker_state()
+        else:
+            state = old_checkpoints[restart]
+            self.init_checker_state(state[0], *state[2:])
+            checkpoints.extend(old_checkpoints[:restart + 1])
+            for error in previous.errors[:state[1]]:
+                self.report_error(*error)
+            self.report.counters['logical lines'] += restart + 1
+        converged = []
+
+        def checkpoint():
+            state = self.save_checkpoint(errors)
+            checkpoints.append(state)
+            if self.line_number < last:
+                return False
+            index = bisect.bisect_left(rows, self.line_number - delta)
+            if (index == len(rows) or rows[index] != self.line_number - delta
+                    or old_checkpoints[index][2:] != state[2:]):
+                return False
+            converged.append(index)
+            return True
+        self.check_tokens(self.resume_tokens(), checkpoint)
+        if converged:
+            index = converged[0]
+            error_shift = len(errors) - old_checkpoints[index][1]
+            for state in old_checkpoints[index + 1:]:
+                checkpoints.append((state[0] + delta, state[1] + error_shift)
+                                   + state[2:])
+            for error in previous.errors[old_checkpoints[index][1]:]:
+                self.report_error(error[0] + delta, *error[1:])
+            self.report.counters['logical lines'] += (len(old_checkpoints) -
+                                                      index - 1)
+
+
+class CheckerState(object):
+    """
+    The lines, the results and the state of the checker after each
+    logical line, returned by Checker.recheck.
+    """
+
+    def __init__(self, lines, checkpoints, errors):
+        self.lines = lines
+        self.checkpoints = checkpoints
+        self.rows = [state[0] for state in checkpoints]
+        self.errors = errors
+
+
+class ErrorRecord(object):
+    """
+    An error kept by a report until the end of the file.
+
+    The message is the text given by the check, which is usually the same
+    string for all its errors, and the check is shared too: a record
+    only holds references.
+    """
+    __slots__ = ('line_number', 'offset', 'text', 'check')
+
+    def __init__(self, line_number, offset, text, check):
+        self.line_number = line_number
+        self.offset = offset
+        self.text = text
+        self.check = check
+
+    def sort_key(self):
+        """Return the position and the text, to sort the errors."""
+        return (self.line_number, self.offset, self.text)
 
 
 class BaseReport(object):
@@ -1415,11 +2198,15 @@ class BaseReport(object):
     def __init__(self, options):
         self._benchmark_keys = options.benchmark_keys
         self._ignore_code = options.ignore_code
+        # The decision of ignore_code for each code seen
+        self._ignored = {}
+        self.max_errors = options.max_errors
         # Results
         self.elapsed = 0
         self.total_errors = 0
         self.counters = dict.fromkeys(self._benchmark_keys, 0)
         self.messages = {}
+        self.timings = {}
 
     def start(self):
         """Start the timer."""
@@ -1446,7 +2233,13 @@ class BaseReport(object):
     def error(self, line_number, offset, text, check):
         """Report an error, according to options."""
         code = text[:4]
-        if self._ignore_code(code):
+        ignored = self._ignored.get(code)
+        if ignored is None:
+            ignored = self._ignored[code] = self._ignore_code(code)
+        if ignored:
+            return
+        if self.max_errors and self.total_errors >= self.max_errors:
+            # The checks stop at the end of the logical line or the file
             return
         if code in self.counters:
             self.counters[code] += 1
@@ -1462,6 +2255,24 @@ class BaseReport(object):
         self.total_errors += 1
         return code
 
+    def limit_reached(self):
+        """Return True when the maximum count of errors is reported."""
+        return self.total_errors >= self.max_errors > 0
+
+    def error_fixed(self, filename, line_number, offset, text):
+        """Signal an error which is fixed, while watching the files."""
+
+    def file_deleted(self, filename):
+        """Signal a file which is deleted, while watching the files."""
+
+    def add_timing(self, name, elapsed, calls=1):
+        """Record the time spent in a check or in a step of the checker."""
+        if name in self.timings:
+            timing = self.timings[name]
+            self.timings[name] = (timing[0] + calls, timing[1] + elapsed)
+        else:
+            self.timings[name] = (calls, elapsed)
+
     def get_file_results(self):
         """Return the count of errors and warnings for this file."""
         return self.file_errors
@@ -1496,6 +2307,17 @@ class BaseReport(object):
                 print('%-7d %s per second (%d total)' %
                       (self.counters[key] / self.elapsed, key,
                        self.counters[key]))
+        for name, (calls, elapsed) in self.get_timings():
+            print('%-7.2f seconds in %s (%d calls)' % (elapsed, name, calls))
+
+    def get_timings(self):
+        """
+        Return the (calls, seconds) profile of the checks and the steps of
+        the checker, slowest first.
+
+        They are collected with the 'benchmark' option.
+        """
+        return sorted(self.timings.items(), key=lambda item: -item[1][1])
 
 
 class FileReport(BaseReport):
@@ -1503,6 +2325,35 @@ class FileReport(BaseReport):
     print_filename = True
 
 
+class ResultReport(BaseReport):
+    """Collect the results of the checks for each file, without printing."""
+
+    def __init__(self, options):
+        super(ResultReport, self).__init__(options)
+        # The results of a file are always complete
+        self.max_errors = 0
+
+    def init_file(self, filename, lines, expected, line_offset):
+        """Signal a new file."""
+        self.results = []
+        self.logical_lines = 0
+        return super(ResultReport, self).init_file(
+            filename, lines, expected, line_offset)
+
+    def increment_logical_line(self):
+        """Signal a new logical line."""
+        self.logical_lines += 1
+        return super(ResultReport, self).increment_logical_line()
+
+    def error(self, line_number, offset, text, check):
+        """Report an error, according to options."""
+        code = super(ResultReport, self).error(line_number, offset,
+                                               text, check)
+        if code:
+            self.results.append((line_number, offset, text, check))
+        return code
+
+
 class StandardReport(BaseReport):
     """Collect and print the results of the checks."""
 
@@ -1526,17 +2377,18 @@ class StandardReport(BaseReport):
                                                  text, check)
         if code and (self.counters[code] == 1 or self._repeat):
             self._deferred_print.append(
-                (line_number, offset, code, text[5:], check.__doc__))
+                ErrorRecord(line_number, offset, text, check))
         return code
 
     def get_file_results(self):
         """Print the result and return the overall count for this file."""
-        self._deferred_print.sort()
-        for line_number, offset, code, text, doc in self._deferred_print:
+        self._deferred_print.sort(key=ErrorRecord.sort_key)
+        for error in self._deferred_print:
+            line_number, offset, text = error.sort_key()
             print(self._fmt % {
                 'path': self.filename,
                 'row': self.line_offset + line_number, 'col': offset + 1,
-                'code': code, 'text': text,
+                'code': text[:4], 'text': text[5:],
             })
             if self._show_source:
                 if line_number > len(self.lines):
@@ -1545,10 +2397,75 @@ class StandardReport(BaseReport):
                     line = self.lines[line_number - 1]
                 print(line.rstrip())
                 print(' ' * offset + '^')
+            doc = error.check.__doc__
             if self._show_pep8 and doc:
                 print(doc.lstrip('\n').rstrip())
         return self.file_errors
 
+    def error_fixed(self, filename, line_number, offset, text):
+        """Print an error which is fixed, while watching the files."""
+        print('%s:%d:%d: fixed %s' % (filename, line_number, offset + 1,
+                                      text))
+
+    def file_deleted(self, filename):
+        """Print a file which is deleted, while watching the files."""
+        print('%s: deleted' % filename)
+
+
+class JSONLinesReport(BaseReport):
+    """
+    Collect the results of the checks and write them as JSON objects,
+    one per line.
+
+    The errors are serialized as soon as they are reported, and written
+    once per file.
+    """
+
+    def __init__(self, options):
+        super(JSONLinesReport, self).__init__(options)
+        self._repeat = options.repeat
+        self._encode = json.JSONEncoder(separators=(',', ':')).encode
+
+    def init_file(self, filename, lines, expected, line_offset):
+        """Signal a new file."""
+        self._buffer = []
+        return super(JSONLinesReport, self).init_file(
+            filename, lines, expected, line_offset)
+
+    def error(self, line_number, offset, text, check):
+        """Report an error, according to options."""
+        code = super(JSONLinesReport, self).error(line_number, offset,
+                                                  text, check)
+        if code and (self.counters[code] == 1 or self._repeat):
+            self._buffer.append(self._encode({
+                'path': self.filename,
+                'row': self.line_offset + line_number, 'col': offset + 1,
+                'code': code, 'text': text[5:], 'check': check.__name__,
+            }) + '\n')
+        return code
+
+    def get_file_results(self):
+        """Write the results and return the overall count for this file."""
+        if self._buffer:
+            sys.stdout.write(''.join(self._buffer))
+            sys.stdout.flush()
+        return self.file_errors
+
+    def error_fixed(self, filename, line_number, offset, text):
+        """Write an error which is fixed, while watching the files."""
+        self._write_event({
+            'path': filename, 'row': line_number, 'col': offset + 1,
+            'code': text[:4], 'text': text[5:], 'event': 'fixed',
+        })
+
+    def file_deleted(self, filename):
+        """Write a file which is deleted, while watching the files."""
+        self._write_event({'path': filename, 'event': 'deleted'})
+
+    def _write_event(self, event):
+        sys.stdout.write(self._encode(event) + '\n')
+        sys.stdout.flush()
+
 
 class DiffReport(StandardReport):
     """Collect and print the results for the changed lines only."""
@@ -1563,6 +2480,98 @@ class DiffReport(StandardReport):
         return super(DiffReport, self).error(line_number, offset, text, check)
 
 
+class DiffJSONLinesReport(JSONLinesReport):
+    """Collect and write the results for the changed lines only."""
+
+    def __init__(self, options):
+        super(DiffJSONLinesReport, self).__init__(options)
+        self._selected = options.selected_lines
+
+    def error(self, line_number, offset, text, check):
+        if line_number not in self._selected[self.filename]:
+            return
+        return super(DiffJSONLinesReport, self).error(line_number, offset,
+                                                      text, check)
+
+
+class ResultCache(object):
+    """Store the results of the checks on disk, keyed by file content."""
+
+    def __init__(self, cache_dir, fingerprint, max_size=CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+
+    def key(self, lines):
+        """Return the cache key for this source code."""
+        source = ''.join(lines)
+        if not isinstance(source, bytes):
+            source = source.encode('utf-8', 'replace')
+        return hashlib.sha1(self.fingerprint + source).hexdigest()
+
+    def get(self, key):
+        """Return the cached results, or None."""
+        path = os.path.join(self.cache_dir, key)
+        try:
+            f = open(path, 'rb')
+            try:
+                logical_lines, results = json.loads(f.read().decode('utf-8'))
+            finally:
+                f.close()
+            results = [tuple(result) for result in results]
+            os.utime(path, None)    # Most recently used
+        except Exception:
+            return None
+        return logical_lines, results
+
+    def set(self, key, value):
+        """Store the results."""
+        path = os.path.join(self.cache_dir, key)
+        temp_path = '%s.%s.tmp' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            f = open(temp_path, 'wb')
+            try:
+                f.write(json.dumps(value).encode('utf-8'))
+            finally:
+                f.close()
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            pass
+
+    def evict(self):
+        """
+        Remove the least recently used entries above the size limit.
+
+        The other files of the directory are neither counted nor removed.
+        """
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        entries = []
+        total_size = 0
+        for name in names:
+            if not CACHE_ENTRY_REGEX.match(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total_size += stat.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            total_size -= size
+
+
 class StyleGuide(object):
     """Initialize a PEP-8 instance with few options."""
 
@@ -1585,8 +2594,15 @@ class StyleGuide(object):
         self.options = options
 
         if not options.reporter:
-            options.reporter = BaseReport if options.quiet else StandardReport
+            if options.quiet:
+                options.reporter = BaseReport
+            elif options.format.lower() == 'jsonl':
+                options.reporter = JSONLinesReport
+            else:
+                options.reporter = StandardReport
 
+        if options.fail_fast and not options.max_errors:
+            options.max_errors = 1
         for index, value in enumerate(options.exclude):
             options.exclude[index] = value.rstrip('/')
         options.select = tuple(options.select or ())
@@ -1598,10 +2614,29 @@ class StyleGuide(object):
             # Ignore all checks which are not explicitly selected
             options.ignore = ('',) if options.select else tuple(options.ignore)
         options.benchmark_keys = BENCHMARK_KEYS[:]
+        skip_generated = options.skip_generated or ()
+        if hasattr(skip_generated, 'split'):
+            skip_generated = skip_generated.split(',')
+        options.skip_generated = tuple(skip_generated)
+        if (options.max_file_size or options.skip_binary or
+                options.skip_generated):
+            options.benchmark_keys.append('skipped files')
         options.ignore_code = self.ignore_code
         options.physical_checks = self.get_checks('physical_line')
         options.logical_checks = self.get_checks('logical_line')
+        options.token_checks = self.get_checks('token')
         options.ast_checks = self.get_checks('tree')
+        options.physical_runners = self.bind_checks(options.physical_checks)
+        options.logical_runners = self.bind_checks(options.logical_checks)
+        self.dispatch_tokens()
+        options.fused_scanner = None
+        if options.fused_scan:
+            self.fuse_checks()
+        self._check_names = None
+        self._result_report = None
+        self.cache = None
+        if options.cache_dir:
+            self.cache = ResultCache(options.cache_dir, self.fingerprint())
         self.init_report()
 
     def init_report(self, reporter=None):
@@ -1615,47 +2650,323 @@ class StyleGuide(object):
             paths = self.paths
         report = self.options.report
         runner = self.runner
+        parallel = (self.options.jobs > 1 and runner == self.input_file and
+                    multiprocessing and hasattr(os, 'fork'))
         report.start()
+        try:
+            if parallel:
+                # Collect the files first, then dispatch them to the workers
+                self.input_files_parallel(self.list_files(paths))
+            else:
+                for path in paths:
+                    if report.limit_reached():
+                        break
+                    if os.path.isdir(path):
+                        self.input_dir(path)
+                    elif not self.excluded(path):
+                        runner(path)
+        except KeyboardInterrupt:
+            print('... stopped')
+        if self.cache is not None:
+            self.cache.evict()
+        report.stop()
+        return report
+
+    def iter_errors(self, paths=None):
+        """
+        Run all checks on the paths, and generate the errors as they are
+        found, like Checker.iter_errors.
+
+        The errors are not printed, and the checks stop when the caller
+        stops reading the errors.
+        """
+        if paths is None:
+            paths = self.paths
+        report = BaseReport(self.options)
+        for filename in self.list_files(paths):
+            if self.skip_file(filename):
+                continue
+            fchecker = self.checker_class(
+                filename, options=self.options, report=report)
+            for error in fchecker.iter_errors():
+                yield error
+
+    def list_files(self, paths):
+        """Return the files to check in the paths, in the order of a run."""
+        filenames = []
+        runner, self.runner = self.runner, filenames.append
         try:
             for path in paths:
                 if os.path.isdir(path):
                     self.input_dir(path)
                 elif not self.excluded(path):
-                    runner(path)
+                    self.runner(path)
+        finally:
+            self.runner = runner
+        return filenames
+
+    def watch(self, paths=None, interval=WATCH_INTERVAL):
+        """
+        Run all checks on the paths, then poll them and check again only
+        the files which are added or modified, until interrupted.
+
+        The files are compared by modification time and size.  The errors
+        of each file are kept between the runs, and only the changes are
+        printed: the new errors, the fixed errors and the deleted files.
+        """
+        global _parallel_state
+        if paths is None:
+            paths = self.paths
+        report = self.options.report
+        result_report = ResultReport(self.options)
+        signatures = {}
+        known_errors = {}
+        pool = None
+        if self.options.jobs > 1 and multiprocessing and hasattr(os, 'fork'):
+            _parallel_state = (self, result_report)
+            pool = multiprocessing.Pool(self.options.jobs)
+        try:
+            while True:
+                changed = []
+                deleted = set(signatures)
+                for filename in self.list_files(paths):
+                    try:
+                        stat = os.stat(filename)
+                    except OSError:
+                        continue
+                    deleted.discard(filename)
+                    signature = (stat.st_mtime, stat.st_size)
+                    if signatures.get(filename) == signature:
+                        continue
+                    signatures[filename] = signature
+                    if not self.skip_file(filename):
+                        changed.append(filename)
+                for filename in sorted(deleted):
+                    del signatures[filename]
+                    known_errors.pop(filename, None)
+                    report.file_deleted(filename)
+                if pool is not None and len(changed) > 1:
+                    chunksize = max(1, len(changed) // (self.options.jobs * 4))
+                    results = pool.imap(_parallel_check, changed, chunksize)
+                else:
+                    results = (self.collect_results(filename, result_report)
+                               for filename in changed)
+                for filename, result in zip(changed, results):
+                    known_errors[filename] = self.replay_changes(
+                        filename, known_errors.get(filename, {}), *result)
+                time.sleep(interval)
         except KeyboardInterrupt:
-            print('... stopped')
-        report.stop()
+            sys.stderr.write('... stopped\n')
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+                _parallel_state = None
         return report
 
+    def replay_changes(self, filename, previous, lines, logical_lines,
+                       results, timings=None):
+        """
+        Report the errors which are not in the previous errors of the
+        file, and the previous errors which are fixed.
+
+        The errors are matched by the content of their line, to ignore
+        the errors which only moved.  Return the errors of the file for
+        the next call.
+        """
+        errors = {}
+        for error in results:
+            line_number = error[0]
+            line = 0 < line_number <= len(lines) and lines[line_number - 1]
+            errors.setdefault((line, error[1], error[2]), []).append(error)
+        new = []
+        fixed = []
+        for key, found in errors.items():
+            new.extend(found[len(previous.get(key, ())):])
+        for key, found in previous.items():
+            fixed.extend(found[len(errors.get(key, ())):])
+        self.replay_file(filename, lines, logical_lines, sorted(new), timings)
+        report = self.options.report
+        for line_number, offset, text, name in sorted(fixed):
+            report.error_fixed(filename, line_number, offset, text)
+        return errors
+
     def input_file(self, filename, lines=None, expected=None, line_offset=0):
         """Run all checks on a Python source file."""
+        if lines is None and self.skip_file(filename):
+            return 0
+        if self.cache is not None and lines is None and not expected:
+            if self._result_report is None:
+                self._result_report = ResultReport(self.options)
+            return self.replay_file(
+                filename, *self.collect_results(filename, self._result_report))
         if self.options.verbose:
             print('checking %s' % filename)
         fchecker = self.checker_class(
             filename, lines=lines, options=self.options)
         return fchecker.check_all(expected=expected, line_offset=line_offset)
 
+    def input_files_parallel(self, filenames):
+        """Run all checks on these files, using a pool of processes."""
+        global _parallel_state
+        filenames = [filename for filename in filenames
+                     if not self.skip_file(filename)]
+        _parallel_state = (self, ResultReport(self.options))
+        report = self.options.report
+        pool = multiprocessing.Pool(self.options.jobs)
+        try:
+            chunksize = max(1, len(filenames) // (self.options.jobs * 4))
+            results = pool.imap(_parallel_check, filenames, chunksize)
+            for filename, result in zip(filenames, results):
+                if report.limit_reached():
+                    break
+                self.replay_file(filename, *result)
+        finally:
+            pool.terminate()
+            pool.join()
+            _parallel_state = None
+
+    def check_sources(self, sources, jobs=None):
+        """
+        Run all checks on in-memory sources, given as (name, text) pairs.
+
+        Return a list of (name, results) pairs in the same order, where
+        the results are the sorted (line_number, offset, text, check_name)
+        of the errors.  Nothing is read from the disk and nothing is printed.
+        The sources are spread over a pool of processes when jobs > 1;
+        it defaults to the --jobs option.
+        """
+        global _parallel_state
+        if jobs is None:
+            jobs = self.options.jobs
+        sources = list(sources)
+        report = ResultReport(self.options)
+        if (jobs > 1 and len(sources) > 1 and
+                multiprocessing and hasattr(os, 'fork')):
+            _parallel_state = (self, report)
+            pool = multiprocessing.Pool(jobs)
+            try:
+                chunksize = max(1, len(sources) // (jobs * 4))
+                results = pool.map(_parallel_check_source, sources, chunksize)
+            finally:
+                pool.terminate()
+                pool.join()
+                _parallel_state = None
+        else:
+            results = [self.collect_results(name, report,
+                                            text.splitlines(True))[2]
+                       for (name, text) in sources]
+        return [(source[0], sorted(result))
+                for (source, result) in zip(sources, results)]
+
+    def collect_results(self, filename, report, lines=None):
+        """
+        Run all checks on a file, or fetch their results from the cache.
+
+        Return the lines, the count of logical lines, the list of errors
+        and the timings of the checks.
+        """
+        fchecker = self.checker_class(
+            filename, lines=lines, options=self.options, report=report)
+        key = None
+        if self.cache is not None and not fchecker._io_error:
+            key = self.cache.key(fchecker.lines)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return (fchecker.lines,) + cached + ({},)
+        fchecker.check_all()
+        results = [(line_number, offset, text, check.__name__)
+                   for (line_number, offset, text, check) in report.results]
+        if key is not None and not fchecker.timed_out:
+            self.cache.set(key, (report.logical_lines, results))
+        timings, report.timings = report.timings, {}
+        return fchecker.lines, report.logical_lines, results, timings
+
+    def replay_file(self, filename, lines, logical_lines, results,
+                    timings=None):
+        """Report the results of the checks which ran somewhere else."""
+        if self.options.verbose:
+            print('checking %s' % filename)
+        report = self.options.report
+        report.init_file(filename, lines, None, 0)
+        report.counters['logical lines'] += logical_lines
+        for name, (calls, elapsed) in (timings or {}).items():
+            report.add_timing(name, elapsed, calls)
+        for line_number, offset, text, name in results:
+            report.error(line_number, offset, text, self._get_check(name))
+        return report.get_file_results()
+
+    def _get_check(self, name):
+        """Find the check object which reported an error."""
+        if self._check_names is None:
+            options = self.options
+            self._check_names = {'readlines': readlines}
+            self._check_names.update(
+                inspect.getmembers(self.checker_class, callable))
+            for name_, check, _ in (options.physical_checks +
+                                    options.logical_checks +
+                                    options.token_checks +
+                                    options.ast_checks):
+                self._check_names[name_] = check
+        return self._check_names.get(name, self.checker_class.check_all)
+
     def input_dir(self, dirname):
         """Check all files in this directory and all subdirectories."""
         dirname = dirname.rstrip('/')
         if self.excluded(dirname):
             return 0
-        counters = self.options.report.counters
+        report = self.options.report
+        counters = report.counters
         verbose = self.options.verbose
-        filepatterns = self.options.filename
         runner = self.runner
-        for root, dirs, files in os.walk(dirname):
+        for root, files in self.walk_dir(dirname):
             if verbose:
                 print('directory ' + root)
             counters['directories'] += 1
-            for subdir in sorted(dirs):
-                if self.excluded(subdir, root):
-                    dirs.remove(subdir)
-            for filename in sorted(files):
-                # contain a pattern that matches?
-                if ((filename_match(filename, filepatterns) and
-                     not self.excluded(filename, root))):
-                    runner(os.path.join(root, filename))
+            for filename in files:
+                if report.limit_reached():
+                    return
+                runner(os.path.join(root, filename))
+
+    def walk_dir(self, dirname):
+        """
+        Generate the directories and their files to check, sorted by name.
+
+        When the 'walk_threads' option is set, the subdirectories are listed
+        in advance by a pool of threads.  It helps on network file systems.
+        """
+        if self.options.walk_threads > 1 and multiprocessing:
+            pool = multiprocessing.dummy.Pool(self.options.walk_threads)
+            scan = lambda path: pool.apply_async(self._scan_dir, (path,))
+        else:
+            pool = None
+            scan = lambda path: _Result(self._scan_dir(path))
+        try:
+            pending = {dirname: scan(dirname)}
+            stack = [dirname]
+            while stack:
+                root = stack.pop()
+                files, dirs = pending.pop(root).get()
+                subdirs = [os.path.join(root, subdir) for subdir in dirs]
+                for subdir in subdirs:
+                    pending[subdir] = scan(subdir)
+                stack.extend(reversed(subdirs))
+                yield root, files
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def _scan_dir(self, root):
+        """List the files to check and the subdirectories to walk."""
+        files, dirs = scan_dir(root)
+        filepatterns = self.options.filename
+        files = [filename for filename in sorted(files)
+                 # contain a pattern that matches?
+                 if (filename_match(filename, filepatterns) and
+                     not self.excluded(filename, root))]
+        dirs = [subdir for subdir in sorted(dirs)
+                if not self.excluded(subdir, root)]
+        return files, dirs
 
     def excluded(self, filename, parent=None):
         """
@@ -1670,6 +2981,60 @@ class StyleGuide(object):
             filename = os.path.join(parent, filename)
         return filename_match(filename, self.options.exclude)
 
+    def skipped(self, filename):
+        """
+        Check if the file is too large, binary or generated, according to
+        the options.  Only the size and the first block are read, and the
+        markers of the generated files are searched in the comments at the
+        top of the file.
+
+        Return the reason, or None.
+        """
+        options = self.options
+        try:
+            if (options.max_file_size and
+                    os.path.getsize(filename) > options.max_file_size):
+                return 'larger than %d bytes' % options.max_file_size
+            if not (options.skip_binary or options.skip_generated):
+                return None
+            f = open(filename, 'rb')
+            try:
+                block = f.read(SKIP_BLOCK_SIZE)
+            finally:
+                f.close()
+        except (IOError, OSError):
+            # The checker reports E902
+            return None
+        if options.skip_binary and b'\0' in block:
+            return 'binary'
+        markers = [(marker, marker if isinstance(marker, bytes)
+                    else marker.encode('utf-8'))
+                   for marker in options.skip_generated]
+        for line in block.splitlines():
+            line = line.strip()
+            if line and not line.startswith(b'#'):
+                break
+            for marker, encoded in markers:
+                if encoded in line:
+                    return 'generated (%s)' % marker
+        return None
+
+    def skip_file(self, filename):
+        """
+        Count the file as skipped if it is too large, binary or generated.
+
+        Return True if it is skipped.
+        """
+        if 'skipped files' not in self.options.benchmark_keys:
+            return False
+        reason = self.skipped(filename)
+        if reason is None:
+            return False
+        if self.options.verbose:
+            print('skipping %s: %s' % (filename, reason))
+        self.options.report.counters['skipped files'] += 1
+        return True
+
     def ignore_code(self, code):
         """
         Check if the error code should be ignored.
@@ -1684,6 +3049,20 @@ class StyleGuide(object):
         return (code.startswith(self.options.ignore) and
                 not code.startswith(self.options.select))
 
+    def fingerprint(self):
+        """Return a digest of the options which affect the results."""
+        options = self.options
+        registered = []
+        for kind in sorted(_checks):
+            for check, (codes, args) in _checks[kind].items():
+                registered.append((kind, check.__module__, check.__name__,
+                                   sorted(codes)))
+        state = (__version__, sys.version_info[0],
+                 self.checker_class.__name__,
+                 options.select, options.ignore, options.max_line_length,
+                 bool(options.hang_closing), sorted(registered))
+        return hashlib.sha1(repr(state).encode('utf-8')).digest()
+
     def get_checks(self, argument_name):
         """
         Find all globally visible functions where the first argument name
@@ -1696,6 +3075,203 @@ class StyleGuide(object):
                 checks.append((check.__name__, check, args))
         return sorted(checks)
 
+    def fuse_checks(self):
+        """
+        Scan each logical line once for the patterns of the selected
+        built-in checks in FUSED_PATTERNS, and run them only on the lines
+        where their pattern matches.
+        """
+        options = self.options
+        fused = dict(FUSED_PATTERNS)
+        patterns = [(name, fused[check])
+                    for (name, check, args) in options.logical_checks
+                    if check in fused]
+        if not patterns:
+            return
+        options.fused_scanner = FusedScanner(patterns)
+        names = options.fused_scanner.names
+        options.logical_runners = [
+            (name, check, fuse_check(name, run) if name in names else run)
+            for (name, check, run) in options.logical_runners]
+
+    def dispatch_tokens(self):
+        """
+        Map each token type, or each operator, to the token checks which
+        receive these tokens.
+
+        The results of the token checks are reported in the same order as
+        if they were logical checks.
+        """
+        options = self.options
+        runners = self.bind_checks(options.token_checks)
+        for name, check, run in runners:
+            options.logical_runners.append(
+                (name, check, collect_token_check(name)))
+        options.token_dispatch = dispatch_token_checks(runners)
+        options.logical_runners.sort()
+
+    def bind_checks(self, checks):
+        """
+        Precompile the argument binding of these checks.
+
+        With the 'benchmark' option, the checks are also profiled.
+        """
+        runners = []
+        for name, check, args in checks:
+            run = bind_check(check, args)
+            if self.options.benchmark:
+                run = profile_check(name, run)
+            runners.append((name, check, run))
+        return runners
+
+
+_parallel_state = None
+
+
+class _Result(object):
+    """A result which is already available, like an AsyncResult."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def _parallel_check(filename):
+    """Run all checks on a file, in a worker process."""
+    pep8style, report = _parallel_state
+    return pep8style.collect_results(filename, report)
+
+
+def _parallel_check_source(source):
+    """Run all checks on an in-memory source, in a worker process."""
+    pep8style, report = _parallel_state
+    name, text = source
+    return pep8style.collect_results(name, report, text.splitlines(True))[2]
+
+
+def serve(pep8style, address):
+    """
+    Answer the check requests received on a Unix socket.
+
+    The style guide stays loaded between the requests.  Each request is
+    a JSON object with the working directory ('cwd'), a list of 'paths'
+    and a list of in-memory 'buffers' as [name, source] pairs.  The answer
+    is a JSON object with the 'output' and the count of 'total_errors',
+    or with an 'error' message if the request failed.
+    A request with the 'stop' key stops the server.
+
+    Only the user can connect to the socket.  A client which sends
+    nothing for SERVE_TIMEOUT seconds is disconnected.
+    Raise socket.error if another server listens on this address.
+    """
+    if os.path.exists(address) and S_ISSOCK(os.stat(address).st_mode):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(address)
+        except socket.error:
+            os.remove(address)  # Stale socket
+        else:
+            raise socket.error('a server is already listening')
+        finally:
+            probe.close()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(address)
+    finally:
+        os.umask(umask)
+    try:
+        server.listen(5)
+        while True:
+            conn = server.accept()[0]
+            try:
+                conn.settimeout(SERVE_TIMEOUT)
+                try:
+                    data = _recv_all(conn)
+                except socket.error:
+                    continue    # Too slow, or gone
+                if not data:
+                    continue    # Probed by another server
+                try:
+                    request = json.loads(data.decode('utf-8'))
+                    if request.get('stop'):
+                        break
+                    response = _serve_request(pep8style, request)
+                except Exception:
+                    exc_type, exc = sys.exc_info()[:2]
+                    response = {'error': '%s: %s' % (exc_type.__name__, exc)}
+                try:
+                    conn.sendall(json.dumps(response).encode('utf-8'))
+                except socket.error:
+                    pass    # The client is gone
+            finally:
+                conn.close()
+    except KeyboardInterrupt:
+        print('... stopped')
+    finally:
+        server.close()
+        os.remove(address)
+
+
+def _serve_request(pep8style, request):
+    """Run the checks of a request and capture the output."""
+    saved_cwd = os.getcwd()
+    saved_stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        os.chdir(request.get('cwd') or saved_cwd)
+        report = pep8style.init_report()
+        for name, source in request.get('buffers') or ():
+            pep8style.input_file(name, lines=source.splitlines(True))
+        pep8style.check_files(request.get('paths') or [])
+    finally:
+        sys.stdout = saved_stdout
+        os.chdir(saved_cwd)
+    return {'output': output.getvalue(), 'total_errors': report.total_errors}
+
+
+def run_client(address, paths):
+    """
+    Send the paths to a server started with '--serve' and print the result.
+
+    The '-' path is sent as an in-memory buffer.  Return the count of
+    errors.  Raise socket.error if the server cannot be reached, and
+    ValueError if it does not answer or if the request failed.
+    """
+    request = {'cwd': os.getcwd(), 'paths': [], 'buffers': []}
+    for path in paths:
+        if path == '-':
+            request['buffers'].append(['stdin', stdin_get_value()])
+        else:
+            request['paths'].append(path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(address)
+        client.sendall(json.dumps(request).encode('utf-8'))
+        client.shutdown(socket.SHUT_WR)
+        data = _recv_all(client)
+    finally:
+        client.close()
+    if not data:
+        raise ValueError('no answer from the server')
+    response = json.loads(data.decode('utf-8'))
+    if 'error' in response:
+        raise ValueError('the server failed: %s' % response['error'])
+    sys.stdout.write(response['output'])
+    return response['total_errors']
+
+
+def _recv_all(sock):
+    """Read from a socket until the other side shuts down."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
 
 def get_parser(prog='pep8', version=__version__):
     parser = OptionParser(prog=prog, version=version,
@@ -1703,7 +3279,9 @@ def get_parser(prog='pep8', version=__version__):
     parser.config_options = [
         'exclude', 'filename', 'select', 'ignore', 'max-line-length',
         'hang-closing', 'count', 'format', 'quiet', 'show-pep8',
-        'show-source', 'statistics', 'verbose']
+        'show-source', 'statistics', 'verbose', 'jobs', 'walk-threads',
+        'cache-dir', 'max-errors', 'fail-fast', 'fused-scan',
+        'max-file-size', 'skip-binary', 'skip-generated', 'file-timeout']
     parser.add_option('-v', '--verbose', default=0, action='count',
                       help="print status messages, or debug with -vv")
     parser.add_option('-q', '--quiet', default=0, action='count',
@@ -1734,6 +3312,25 @@ def get_parser(prog='pep8', version=__version__):
                       help="print total number of errors and warnings "
                            "to standard error and set exit code to 1 if "
                            "total is not null")
+    parser.add_option('--max-errors', type='int', metavar='n', default=0,
+                      help="stop after this number of errors and warnings")
+    parser.add_option('--fail-fast', action='store_true',
+                      help="stop on the first error or warning, same as "
+                           "--max-errors=1")
+    parser.add_option('--max-file-size', type='int', metavar='n', default=0,
+                      help="skip the files larger than n bytes")
+    parser.add_option('--skip-binary', action='store_true',
+                      help="skip the files with a null byte in their first "
+                           "block")
+    parser.add_option('--skip-generated', metavar='markers', default='',
+                      help="skip the files whose leading comments contain "
+                           "one of these comma separated markers (e.g. "
+                           "@generated,DO NOT EDIT)")
+    parser.add_option('--file-timeout', type='float', metavar='seconds',
+                      default=0,
+                      help="stop checking a file after this time, and "
+                           "report E903 with the running check (without "
+                           "SIGALRM, only between the logical lines)")
     parser.add_option('--max-line-length', type='int', metavar='n',
                       default=MAX_LINE_LENGTH,
                       help="set maximum allowed line length "
@@ -1742,10 +3339,35 @@ def get_parser(prog='pep8', version=__version__):
                       help="hang closing bracket instead of matching "
                            "indentation of opening bracket's line")
     parser.add_option('--format', metavar='format', default='default',
-                      help="set the error format [default|pylint|<custom>]")
+                      help="set the error format "
+                           "[default|pylint|jsonl|<custom>]")
     parser.add_option('--diff', action='store_true',
                       help="report only lines changed according to the "
                            "unified diff received on STDIN")
+    parser.add_option('--changed-since', metavar='ref',
+                      help="report only lines changed since this git "
+                           "reference")
+    parser.add_option('-j', '--jobs', type='int', metavar='n', default=1,
+                      help="number of processes used to check the files "
+                           "(default: %default)")
+    parser.add_option('--walk-threads', type='int', metavar='n', default=0,
+                      help="number of threads used to list the directories "
+                           "(default: %default)")
+    parser.add_option('--fused-scan', action='store_true',
+                      help="scan each logical line once for the patterns of "
+                           "the built-in checks")
+    parser.add_option('--cache-dir', metavar='path',
+                      help="cache the results in this directory, and skip "
+                           "the files which did not change")
+    parser.add_option('--watch', action='store_true',
+                      help="keep running and check again the files which "
+                           "are modified")
+    parser.add_option('--serve', metavar='socket',
+                      help="keep running and answer the requests received "
+                           "on this Unix socket")
+    parser.add_option('--client', metavar='socket',
+                      help="send the paths to the server listening on this "
+                           "Unix socket")
     group = parser.add_option_group("Testing Options")
     if os.path.exists(TESTSUITE_PATH):
         group.add_option('--testsuite', metavar='dir',
@@ -1833,24 +3455,45 @@ def process_options(arglist=None, parse_argv=False, config_file=None,
         args.append(options.testsuite)
     elif not options.ensure_value('doctest', False):
         if parse_argv and not args:
-            if options.diff or any(os.path.exists(name)
-                                   for name in PROJECT_CONFIG):
+            if options.diff or options.changed_since or options.serve or any(
+                    os.path.exists(name) for name in PROJECT_CONFIG):
                 args = ['.']
             else:
                 parser.error('input not specified')
-        options = read_config(options, args, arglist, parser)
+        if not options.client:
+            # The server reads the configuration
+            options = read_config(options, args, arglist, parser)
+        else:
+            for name in parser.config_options:
+                dest = name.replace('-', '_')
+                if getattr(options, dest) != parser.defaults.get(dest):
+                    parser.error('--%s cannot be used with --client, the '
+                                 'options of the server apply' % name)
         options.reporter = parse_argv and options.quiet == 1 and FileReport
 
     options.filename = options.filename and options.filename.split(',')
     options.exclude = options.exclude.split(',')
     options.select = options.select and options.select.split(',')
     options.ignore = options.ignore and options.ignore.split(',')
+    options.skip_generated = (options.skip_generated and
+                              options.skip_generated.split(','))
 
-    if options.diff:
-        options.reporter = DiffReport
+    if options.changed_since:
+        try:
+            options.selected_lines = git_changed_lines(
+                options.changed_since, options.filename, args)
+        except (OSError, ValueError):
+            parser.error('--changed-since: %s' % sys.exc_info()[1])
+        args = sorted(options.selected_lines)
+    elif options.diff:
         stdin = stdin_get_value()
         options.selected_lines = parse_udiff(stdin, options.filename, args[0])
         args = sorted(options.selected_lines)
+    if options.changed_since or options.diff:
+        if options.format.lower() == 'jsonl':
+            options.reporter = DiffJSONLinesReport
+        else:
+            options.reporter = DiffReport
 
     return options, args
 
@@ -1859,6 +3502,19 @@ def _main():
     """Parse options and run checks on Python source."""
     pep8style = StyleGuide(parse_argv=True, config_file=True)
     options = pep8style.options
+    try:
+        if options.serve:
+            return serve(pep8style, options.serve)
+        if options.client:
+            if run_client(options.client, pep8style.paths):
+                sys.exit(1)
+            return
+    except (socket.error, ValueError):
+        sys.stderr.write('pep8: %s: %s\n' % (options.serve or options.client,
+                                             sys.exc_info()[1]))
+        sys.exit(2)
+    if options.watch:
+        return pep8style.watch()
     if options.doctest or options.testsuite:
         from testsuite.support import run_tests
         report = run_tests(pep8style)
@@ -10,6 +10,8 @@ foo(bar =True)
 foo(bar = True)
 #: E251
 y = bar(root= "sdasd")
+#: E251 E251
+foo(bar=(1), baz = 2)
 #: Okay
 foo(bar=(1 == 1))
 foo(bar=(1 != 1))
@@ -17,3 +19,5 @@ foo(bar=(1 >= 1))
 foo(bar=(1 <= 1))
 (options, args) = parser.parse_args()
 d[type(None)] = _deepcopy_atomic
+handlers = [lambda event = None: event]
+d = {1: lambda x = 1: x}
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks for the hot paths of the checker.
+
+Usage: python -m testsuite.benchmark [name ...]
+"""
+import io
+import os.path
+import sys
+import time
+
+import pep8
+from testsuite.support import ROOT_DIR
+
+REPEAT = 3
+
+
+def load_corpus():
+    """Return the source of pep8.py and of the test files."""
+    testsuite = os.path.join(ROOT_DIR, 'testsuite')
+    filenames = [os.path.join(ROOT_DIR, 'pep8.py')]
+    filenames += [os.path.join(testsuite, fn)
+                  for fn in sorted(os.listdir(testsuite))
+                  if fn.endswith('.py')]
+    return [pep8.readlines(fn) for fn in filenames]
+
+
+def load_stdlib():
+    """Return the source of the modules at the top of the standard library."""
+    stdlib = os.path.dirname(os.__file__)
+    return [pep8.readlines(os.path.join(stdlib, fn))
+            for fn in sorted(os.listdir(stdlib)) if fn.endswith('.py')]
+
+
+def timed(func, *args):
+    """Return the best time of a few runs of func(*args)."""
+    best = None
+    for index in range(REPEAT):
+        start = time.time()
+        func(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def print_timing(label, elapsed, count, unit='line'):
+    print('%-40s %8.3f us per %s' % (label, elapsed * 1e6 / count, unit))
+
+
+def bench_dispatch():
+    """Per-line cost of the argument binding of the physical checks."""
+    pep8style = pep8.StyleGuide(quiet=True)
+    options = pep8style.options
+    lines = [line for source in load_corpus() for line in source] * 5
+    checker = pep8.Checker(lines=lines, options=options)
+    checker.line_number = 0
+    checker.indent_char = ' '
+    checker.physical_line = lines[0]
+
+    def run_getattr():
+        for line in lines:
+            for name, check, args in options.physical_checks:
+                checker.run_check(check, args)
+
+    def run_bound():
+        for line in lines:
+            for name, check, run in options.physical_runners:
+                run(checker)
+
+    count = len(lines)
+    print_timing('dispatch: getattr per argument', timed(run_getattr), count)
+    print_timing('dispatch: precompiled binding', timed(run_bound), count)
+
+
+def bench_offsets():
+    """Per-error cost of mapping an offset on a 50k-token logical line."""
+    lines = ['x = [0' + ' ,0' * 24999 + ']\n']
+    pep8style = pep8.StyleGuide(select='E203', quiet=True)
+    checker = pep8.Checker(lines=lines, options=pep8style.options)
+    report = pep8style.options.report
+    elapsed = timed(checker.check_all)
+    count = report.counters['E203'] // REPEAT
+    print('%d tokens, %d errors' % (len(checker.mapping), count))
+    print_timing('offsets: check_all', elapsed, count, 'error')
+
+    offsets = range(0, len(checker.logical_line), 500)
+
+    def map_linear():
+        for offset in offsets:
+            for token_offset, token in checker.mapping:
+                if offset >= token_offset:
+                    orig = (token[2][0], token[2][1] + offset - token_offset)
+
+    def map_bisect():
+        for offset in offsets:
+            index = pep8.bisect.bisect_right(checker.mapping_offsets, offset)
+            token_offset, token = checker.mapping[max(index - 1, 0)]
+            orig = (token[2][0], token[2][1] + offset - token_offset)
+
+    count = len(offsets)
+    print_timing('offsets: linear scan', timed(map_linear), count, 'error')
+    print_timing('offsets: bisect', timed(map_bisect), count, 'error')
+
+
+def missing_whitespace_prefix(logical_line):
+    """The E231 check of pep8 1.4.6, which scans the prefix of the line."""
+    line = logical_line
+    for index in range(len(line) - 1):
+        char = line[index]
+        if char in ',;:' and line[index + 1] not in pep8.WHITESPACE:
+            before = line[:index]
+            if char == ':' and before.count('[') > before.count(']') and \
+                    before.rfind('{') < before.rfind('['):
+                continue  # Slice syntax, no space required
+            if char == ',' and line[index + 1] == ')':
+                continue  # Allow tuple with only one element: (3,)
+            yield index, "E231 missing whitespace after '%s'" % char
+
+
+def bench_e231():
+    """Cost of E231 on a 20k-character literal list."""
+    line = "x = [" + ",".join(["{'a':b[1:2]}"] * 1600) + "]"
+    print('%d characters' % len(line))
+    expected = list(missing_whitespace_prefix(line))
+    assert list(pep8.missing_whitespace(line)) == expected
+
+    def run(check):
+        for result in check(line):
+            pass
+
+    count = len(line)
+    print_timing('E231: prefix scans', timed(run, missing_whitespace_prefix),
+                 count, 'char')
+    print_timing('E231: single pass', timed(run, pep8.missing_whitespace),
+                 count, 'char')
+
+
+def nested_literal(count):
+    """Return a JSON-like literal spanning about 5 * count rows."""
+    lines = ['data = {\n']
+    for index in range(count):
+        lines += ["    'key%d': [\n" % index,
+                  "        {'a': 1,\n",
+                  "         'b': [1, 2,\n",
+                  "               3]},\n",
+                  "    ],\n"]
+    lines.append('}\n')
+    return lines
+
+
+def bench_e12():
+    """Cost of E12 per row on nested literals of growing size."""
+    pep8style = pep8.StyleGuide(select='E12', quiet=True)
+    for count in (500, 1000, 2000, 4000):
+        lines = nested_literal(count)
+        checker = pep8.Checker(lines=lines, options=pep8style.options)
+        print_timing('E12: %d rows' % len(lines), timed(checker.check_all),
+                     len(lines), 'row')
+
+
+def bench_recheck():
+    """Cost of a one-character edit in the middle of a 10k-line file."""
+    pep8style = pep8.StyleGuide(quiet=True)
+    lines = [line for source in load_corpus() for line in source]
+    lines = (lines * (10000 // len(lines) + 1))[:10000]
+    checker = pep8.Checker(lines=lines, options=pep8style.options)
+    state = checker.recheck(lines)
+    row = len(lines) // 2
+    edited = lines[:]
+    edited[row] = edited[row].replace(' ', '  ', 1)
+
+    def run_recheck():
+        checker.recheck(edited, [(row + 1, row + 1)], state)
+
+    print_timing('recheck: check_all', timed(checker.check_all), 1, 'edit')
+    print_timing('recheck: recheck', timed(run_recheck), 1, 'edit')
+
+
+def bench_ignore():
+    """Per-error cost of the select or ignore lists of a large config."""
+    codes = ['%s%d' % (prefix, number) for prefix in 'EWCF'
+             for number in range(100, 1000, 7)]
+    texts = ['%s message' % code for code in codes] * 20
+    count = len(texts)
+    for option in ('select', 'ignore'):
+        pep8style = pep8.StyleGuide(quiet=True, **{option: codes[::2]})
+        report = pep8style.options.report
+        report.init_file('bench.py', [], None, 0)
+
+        def run_ignore_code():
+            ignore_code = pep8style.ignore_code
+            for text in texts:
+                ignore_code(text[:4])
+
+        def run_error():
+            error = report.error
+            for text in texts:
+                error(1, 0, text, pep8.tabs_obsolete)
+
+        label = '%s %d codes' % (option, len(codes[::2]))
+        print_timing('%s: ignore_code' % label, timed(run_ignore_code),
+                     count, 'error')
+        print_timing('%s: report.error' % label, timed(run_error),
+                     count, 'error')
+
+
+def bench_fused():
+    """Throughput of the checks with and without the fused scan."""
+    corpus = load_stdlib()
+    print('%d files of the standard library' % len(corpus))
+    count = sum([len(lines) for lines in corpus])
+    for fused_scan in (False, True):
+        pep8style = pep8.StyleGuide(fused_scan=fused_scan, quiet=True)
+
+        def run():
+            for lines in corpus:
+                pep8.Checker(lines=lines, options=pep8style.options,
+                             report=pep8style.options.report).check_all()
+        label = 'fused: %s' % ('one scan' if fused_scan else 'per check')
+        print_timing(label, timed(run), count)
+
+
+def bench_tokens():
+    """Cost of the checks of the tokens, without the tokenizer."""
+    pep8style = pep8.StyleGuide(
+        select=['E211', 'E225', 'E226', 'E227', 'E228', 'E251', 'E26',
+                'E502'], quiet=True)
+    options = pep8style.options
+    checkers = []
+    for lines in load_stdlib():
+        checker = pep8.Checker(lines=lines, options=options)
+        checker.init_checker_state()
+        tokens = list(pep8.tokenize.generate_tokens(checker.readline))
+        checkers.append((checker, tokens))
+    count = sum([len(tokens) for checker, tokens in checkers])
+    print('%d tokens of the standard library' % count)
+
+    def run():
+        for checker, tokens in checkers:
+            checker.report.init_file(checker.filename, checker.lines, 0, 0)
+            checker.init_checker_state()
+            checker.check_tokens(iter(tokens))
+    print_timing('tokens: %d checks' % len(options.token_checks +
+                                           options.logical_checks),
+                 timed(run), count, 'token')
+
+
+def bench_long_lines():
+    """Cost of the checks of the tokens on very long logical lines."""
+    pep8style = pep8.StyleGuide(
+        select=['E211', 'E225', 'E226', 'E227', 'E228', 'E251', 'E26'],
+        quiet=True)
+    table = ['TABLE = [\n']
+    table += ['    -%d, %d * 2,  # row %d\n' % (index, index, index)
+              for index in range(5000)]
+    table.append(']\n')
+    operators = ['f = lambda x=1: x' + ' + x' * 10000 + '\n']
+    for label, lines in (('5000 rows', table), ('10000 operators', operators)):
+        checker = pep8.Checker(lines=lines, options=pep8style.options)
+        checker.init_checker_state()
+        count = len(list(pep8.tokenize.generate_tokens(checker.readline)))
+        print_timing('long lines: %s' % label, timed(checker.check_all),
+                     count, 'token')
+
+
+def readlines_bulk(filename):
+    """
+    Read the file with a single read() and decode it in one call, like
+    pep8.readlines.  The lines are split by str.splitlines when the text
+    is ASCII without the other separators it knows, like form feeds.
+
+    With Python 2, the lines are byte strings split on the newlines only,
+    like file.readlines.
+    """
+    f = open(filename, 'rb')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    if sys.version_info < (3,):
+        if '\r' in data:
+            return io.BytesIO(data).readlines()
+        return data.splitlines(True)
+    try:
+        readline = io.BytesIO(data).readline
+        coding, first = pep8.tokenize.detect_encoding(readline)
+        start = sum([len(line) for line in first])
+        text = data[start:].decode(coding)
+    except (LookupError, SyntaxError, UnicodeError):
+        coding, first, start = 'latin-1', [], 0
+        text = data.decode(coding)
+    ascii = len(text) == len(data) - start
+    del data
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = [line.decode(coding) for line in first]
+    if ascii and not any([char in text for char in '\x0b\x0c\x1c\x1d\x1e']):
+        lines += text.splitlines(True)
+    else:
+        lines += io.StringIO(text).readlines()
+    return lines
+
+
+def bench_readlines():
+    """Cost of reading the files, compared with a bulk read."""
+    stdlib = os.path.dirname(os.__file__)
+    filenames = [os.path.join(stdlib, fn) for fn in sorted(os.listdir(stdlib))
+                 if fn.endswith('.py')]
+    for filename in filenames:
+        assert readlines_bulk(filename) == pep8.readlines(filename)
+    count = sum([len(pep8.readlines(fn)) for fn in filenames])
+    print('%d files of the standard library' % len(filenames))
+
+    def run(read):
+        for filename in filenames:
+            read(filename)
+    print_timing('readlines: pep8.readlines', timed(run, pep8.readlines),
+                 count)
+    print_timing('readlines: bulk read', timed(run, readlines_bulk), count)
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+    largest = max(filenames, key=os.path.getsize)
+    for label, read in (('pep8.readlines', pep8.readlines),
+                        ('bulk read', readlines_bulk)):
+        tracemalloc.start()
+        lines = read(largest)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('%-40s %8.1f times the size of the lines' %
+              ('readlines: %s peak' % label, float(peak) / current))
+
+
+BENCHMARKS = [
+    ('dispatch', bench_dispatch),
+    ('offsets', bench_offsets),
+    ('E231', bench_e231),
+    ('E12', bench_e12),
+    ('recheck', bench_recheck),
+    ('ignore', bench_ignore),
+    ('fused', bench_fused),
+    ('tokens', bench_tokens),
+    ('long lines', bench_long_lines),
+    ('readlines', bench_readlines),
+]
+
+
+def _main(names):
+    for name, bench in BENCHMARKS:
+        if not names or name in names:
+            bench()
+
+if __name__ == '__main__':
+    _main(sys.argv[1:])
@@ -16,6 +16,9 @@ class PseudoFile(list):
     def getvalue(self):
         return ''.join(self)
 
+    def flush(self):
+        pass
+
 
 class TestReport(StandardReport):
     """Collect the results for the tests."""
@@ -63,7 +66,8 @@ def selftest(options):
     count_failed = count_all = 0
     report = BaseReport(options)
     counters = report.counters
-    checks = options.physical_checks + options.logical_checks
+    checks = (options.physical_checks + options.logical_checks +
+              options.token_checks)
     for name, check, argument_names in checks:
         for line in check.__doc__.splitlines():
             line = line.lstrip()
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
+import json
 import os.path
 import shlex
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import unittest
 
 import pep8
@@ -76,6 +81,29 @@ class APITestCase(unittest.TestCase):
         self.assertTrue(any(func == check_dummy
                             for name, func, args in options.logical_checks))
 
+    def test_register_token_check(self):
+        def check_dummy(token, token_index, bracket_depth):
+            if bracket_depth and token[1] == ',':
+                yield token[2], 'Z801 comma at index %d' % token_index
+        check_dummy.operators = (',',)
+        pep8.register_check(check_dummy, ['Z801'])
+
+        self.assertTrue(check_dummy in pep8._checks['token'])
+        codes, args = pep8._checks['token'][check_dummy]
+        self.assertTrue('Z801' in codes)
+        self.assertEqual(args, ['token', 'token_index', 'bracket_depth'])
+
+        pep8style = pep8.StyleGuide(select=['Z8'])
+        options = pep8style.options
+        self.assertTrue(any(func == check_dummy
+                            for name, func, args in options.token_checks))
+        self.assertEqual(list(options.token_dispatch), [','])
+
+        source = 'a, b = f(1,\n         2), 3\n'
+        results = pep8style.check_sources([('dummy.py', source)])
+        self.assertEqual(results, [('dummy.py', [
+            (1, 10, 'Z801 comma at index 7', 'check_dummy')])])
+
     def test_register_ast_check(self):
         pep8.register_check(DummyChecker, ['Z701'])
 
@@ -105,6 +133,43 @@ class APITestCase(unittest.TestCase):
 
         self.assertRaises(TypeError, pep8.register_check)
 
+    def test_bind_check(self):
+        def check_one(physical_line):
+            return physical_line
+
+        def check_many(physical_line, line_number, max_line_length):
+            return physical_line, line_number, max_line_length
+
+        checker = pep8.Checker(lines=['spam\n'], max_line_length=42)
+        checker.physical_line = 'spam\n'
+        checker.line_number = 1
+        run = pep8.bind_check(check_one, ['physical_line'])
+        self.assertEqual(run(checker), 'spam\n')
+        run = pep8.bind_check(check_many, ['physical_line', 'line_number',
+                                           'max_line_length'])
+        self.assertEqual(run(checker), ('spam\n', 1, 42))
+
+    def test_checker_custom_options(self):
+        # An options object which was not prepared by a StyleGuide
+        pep8style = pep8.StyleGuide()
+
+        class Options(object):
+            physical_checks = pep8style.get_checks('physical_line')
+            logical_checks = pep8style.get_checks('logical_line')
+            token_checks = pep8style.get_checks('token')
+            ast_checks = []
+            max_line_length = 79
+            hang_closing = False
+            verbose = 0
+            report = pep8.StandardReport(pep8style.options)
+        checker = pep8.Checker('spam.py', lines=['a=1 # spam \n'],
+                               options=Options)
+        self.assertEqual(checker.check_all(), 3)
+        self.assertEqual(sys.stdout.getvalue().splitlines(), [
+            'spam.py:1:2: E225 missing whitespace around operator',
+            'spam.py:1:4: E261 at least two spaces before inline comment',
+            'spam.py:1:11: W291 trailing whitespace'])
+
     def test_styleguide(self):
         report = pep8.StyleGuide().check_files()
         self.assertEqual(report.total_errors, 0)
@@ -226,6 +291,13 @@ class APITestCase(unittest.TestCase):
         self.assertFalse(pep8style.ignore_code('F401'))
         self.assertTrue(pep8style.ignore_code('F402'))
 
+        report = pep8.BaseReport(pep8style.options)
+        report.init_file('stdin', [], None, 0)
+        for code in ('F401', 'F402', 'F401', 'F402'):
+            self.assertEqual(report.error(1, 0, code + ' text', None),
+                             code if code == 'F401' else None)
+        self.assertEqual(report.total_errors, 2)
+
     def test_styleguide_excluded(self):
         pep8style = pep8.StyleGuide(paths=[E11])
 
@@ -242,6 +314,37 @@ class APITestCase(unittest.TestCase):
         self.assertFalse(pep8style.excluded('./CVSoup'))
         self.assertFalse(pep8style.excluded('./CVS/subdir'))
 
+    def test_styleguide_walk_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for path in ('b/z.py', 'b/a.txt', 'a/y.py', 'a/CVS/x.py',
+                         'a/sub/w.py', 'v.py'):
+                path = os.path.join(temp_dir, path)
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                open(path, 'w').close()
+            if hasattr(os, 'symlink'):
+                os.symlink(os.path.join(temp_dir, 'a'),
+                           os.path.join(temp_dir, 'c'))
+            expected = [(temp_dir, ['v.py']),
+                        (os.path.join(temp_dir, 'a'), ['y.py']),
+                        (os.path.join(temp_dir, 'a', 'sub'), ['w.py']),
+                        (os.path.join(temp_dir, 'b'), ['z.py'])]
+
+            pep8style = pep8.StyleGuide()
+            self.assertEqual(list(pep8style.walk_dir(temp_dir)), expected)
+            pep8style = pep8.StyleGuide(walk_threads=3)
+            self.assertEqual(list(pep8style.walk_dir(temp_dir)), expected)
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertTrue(pep8.filename_match('spam.py', ['*.txt', '*.py']))
+        self.assertFalse(pep8.filename_match('spam.pyc', ['*.txt', '*.py']))
+        self.assertTrue(pep8.filename_match('spam.pyc', [], default=True))
+        match = pep8.compile_patterns(['*.txt', 'a?c'])
+        self.assertTrue(match('abc'))
+        self.assertFalse(match('abcd'))
+
     def test_styleguide_checks(self):
         pep8style = pep8.StyleGuide(paths=[E11])
 
@@ -283,6 +386,60 @@ class APITestCase(unittest.TestCase):
         self.assertFalse(any(func == pep8.indentation
                              for name, func, args in options.logical_checks))
 
+    def test_styleguide_physical_only(self):
+        lines = ['if True:\n', '\tx = (1,  \n', '  2)  # ' + 'x' * 80 + '\n']
+        expected = [(2, 0, 'W191'), (2, 8, 'W291'), (3, 79, 'E501')]
+        pep8style = pep8.StyleGuide(select=['W191', 'W291', 'E501'])
+        report = pep8.ResultReport(pep8style.options)
+        checker = pep8.Checker(lines=lines, options=pep8style.options,
+                               report=report)
+        self.assertTrue(checker._physical_only)
+        checker.check_all()
+        self.assertEqual([(row, col, text[:4])
+                          for (row, col, text, check) in report.results],
+                         expected)
+        self.assertEqual(report.counters['logical lines'], 0)
+
+        # E901 needs the tokenizer
+        pep8style = pep8.StyleGuide(select=['E501', 'E9'])
+        checker = pep8.Checker(lines=lines, options=pep8style.options)
+        self.assertFalse(checker._physical_only)
+
+        # The physical checks which use the state of the tokenizer too
+        def check_blank_indent(physical_line, blank_lines, indent_level):
+            if blank_lines and indent_level:
+                return 0, 'W999 blank line in a block'
+        pep8.register_check(check_blank_indent, ['W999'])
+        lines = ['if True:\n', '    x = 1\n', '\n', '    y = 2\n']
+        pep8style = pep8.StyleGuide(select=['W999'])
+        report = pep8.ResultReport(pep8style.options)
+        checker = pep8.Checker(lines=lines, options=pep8style.options,
+                               report=report)
+        self.assertFalse(checker._physical_only)
+        checker.check_all()
+        self.assertEqual([(row, col, text[:4])
+                          for (row, col, text, check) in report.results],
+                         [(4, 0, 'W999')])
+
+    def test_styleguide_fused_scan(self):
+        scanner = pep8.FusedScanner([('a', 'x+'), ('b', 'y'), ('c', 'xy')])
+        self.assertEqual(scanner('zz'), ())
+        self.assertEqual(scanner('zyx'), ['a', 'b'])
+        self.assertEqual(scanner('zxy'), ['a', 'b', 'c'])
+
+        testsuite = os.path.join(ROOT_DIR, 'testsuite')
+        results = []
+        for fused_scan in (False, True):
+            pep8style = pep8.StyleGuide(fused_scan=fused_scan, select='E,W')
+            self.assertEqual(pep8style.options.fused_scanner is not None,
+                             fused_scan)
+            results.append(pep8style.check_sources(
+                (fn, ''.join(pep8.readlines(os.path.join(testsuite, fn))))
+                for fn in sorted(os.listdir(testsuite))
+                if fn.endswith('.py')))
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(any(errors for (fn, errors) in results[0]))
+
     def test_styleguide_init_report(self):
         pep8style = pep8.StyleGuide(paths=[E11])
 
@@ -310,6 +467,436 @@ class APITestCase(unittest.TestCase):
         # < 3.3 raises TypeError; >= 3.3 raises AttributeError
         self.assertRaises(Exception, pep8style.check_files, [42])
 
+    def test_styleguide_jobs(self):
+        testsuite = os.path.join(ROOT_DIR, 'testsuite')
+        pep8style = pep8.StyleGuide(paths=[testsuite], show_source=True)
+
+        report = pep8style.check_files()
+        serial_stdout = sys.stdout.getvalue()
+        serial_counters = report.counters
+        self.assertTrue(report.total_errors)
+        self.reset()
+
+        pep8style = pep8.StyleGuide(paths=[testsuite], show_source=True,
+                                    jobs=2)
+        self.assertEqual(pep8style.options.jobs, 2)
+        report = pep8style.check_files()
+        self.assertEqual(sys.stdout.getvalue(), serial_stdout)
+        self.assertEqual(report.counters, serial_counters)
+        self.assertFalse(sys.stderr)
+
+    def test_styleguide_check_sources(self):
+        pep8style = pep8.StyleGuide(ignore=['E501'])
+        sources = [('a.py', 'import os, sys\n'),
+                   ('b.py', 'x = 1\n'),
+                   ('c.py', 'if True :\n    x=1 \n'),
+                   ('d.py', '')]
+
+        results = pep8style.check_sources(sources)
+        self.assertEqual([name for (name, errors) in results],
+                         ['a.py', 'b.py', 'c.py', 'd.py'])
+        self.assertEqual(results[0][1], [
+            (1, 9, 'E401 multiple imports on one line',
+             'imports_on_separate_lines')])
+        self.assertEqual(results[1][1], [])
+        self.assertEqual([error[2][:4] for error in results[2][1]],
+                         ['E203', 'E225', 'W291'])
+        self.assertEqual(results[3][1], [])
+
+        self.assertEqual(pep8style.check_sources(iter(sources), jobs=2),
+                         results)
+        self.assertFalse(sys.stdout)
+        self.assertFalse(sys.stderr)
+
+    def test_styleguide_iter_errors(self):
+        pep8style = pep8.StyleGuide(paths=[E11], select=['E1'])
+        report = pep8style.check_files()
+        expected = sys.stdout.getvalue().splitlines()
+        self.assertTrue(expected)
+        self.reset()
+
+        errors = list(pep8style.iter_errors())
+        self.assertEqual(['%s:%s:%s: %s %s' % error for error in errors],
+                         expected)
+        self.assertEqual(len(errors), report.total_errors)
+
+        errors = pep8style.iter_errors([E11])
+        self.assertEqual(next(errors)[:4], (E11, 3, 3, 'E111'))
+        errors.close()
+
+        self.assertFalse(sys.stdout)
+        checker = pep8.Checker(E11, select=['E112'])
+        errors = list(checker.iter_errors())
+        self.assertEqual(errors, [(E11, 9, 1, 'E112',
+                                   'expected an indented block')])
+        self.assertEqual(sys.stdout.getvalue().splitlines(),
+                         ['%s:%s:%s: %s %s' % errors[0]])
+        self.assertFalse(sys.stderr)
+
+    def test_styleguide_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            self._check_cache(cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def _check_cache(self, cache_dir):
+        runs = []
+
+        class CountingChecker(pep8.Checker):
+            def check_all(self, *args, **kwargs):
+                runs.append(self.filename)
+                return super(CountingChecker, self).check_all(*args, **kwargs)
+
+        pep8style = pep8.StyleGuide(paths=[E11], cache_dir=cache_dir,
+                                    checker_class=CountingChecker)
+        report = pep8style.check_files()
+        stdout = sys.stdout.getvalue()
+        counters = report.counters
+        self.assertEqual(report.total_errors, 4)
+        self.assertEqual(runs, [E11])
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.reset()
+
+        # The results are replayed from the cache
+        pep8style.init_report()
+        report = pep8style.check_files()
+        self.assertEqual(sys.stdout.getvalue(), stdout)
+        self.assertEqual(report.total_errors, 4)
+        self.assertEqual(report.counters, counters)
+        self.assertEqual(runs, [E11])
+        self.reset()
+
+        # Other options do not share the results
+        pep8style = pep8.StyleGuide(paths=[E11], cache_dir=cache_dir,
+                                    checker_class=CountingChecker,
+                                    select='E11', max_line_length=50)
+        report = pep8style.check_files()
+        self.assertEqual(report.total_errors, 4)
+        self.assertEqual(runs, [E11, E11])
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        # Only the entries of the cache are evicted
+        for name in ('precious.txt', 'a.py', '%s.123.tmp' % ('0' * 40)):
+            f = open(os.path.join(cache_dir, name), 'w')
+            f.write('x' * 100)
+            f.close()
+        pep8style.cache.max_size = 0
+        pep8style.cache.evict()
+        self.assertEqual(sorted(os.listdir(cache_dir)),
+                         ['a.py', 'precious.txt'])
+
+        # An entry which is not valid is checked again
+        key = pep8style.cache.key(pep8.readlines(E11))
+        f = open(os.path.join(cache_dir, key), 'wb')
+        f.write(b'\x80\x02c__builtin__\neval\n')
+        f.close()
+        self.assertEqual(pep8style.cache.get(key), None)
+        report = pep8style.init_report()
+        pep8style.check_files()
+        self.assertEqual(report.total_errors, 4)
+        self.assertEqual(runs, [E11, E11, E11])
+
+    def test_styleguide_benchmark(self):
+        pep8style = pep8.StyleGuide(paths=[E11], benchmark=True, quiet=True)
+        report = pep8style.check_files()
+        timings = report.timings
+        logical_lines = report.counters['logical lines']
+        self.assertEqual(timings['build_tokens_line'][0], logical_lines)
+        self.assertEqual(timings['indentation'][0], logical_lines)
+        self.assertEqual(timings['tabs_or_spaces'][0],
+                         report.counters['physical lines'])
+        self.assertTrue(timings['tokenize'][0] > logical_lines)
+        self.assertEqual(report.get_timings()[0][1],
+                         max(timings.values(), key=lambda t: t[1]))
+
+        report.print_benchmark()
+        stdout = sys.stdout.getvalue()
+        self.assertTrue(' seconds in tokenize (' in stdout)
+        self.assertTrue(' seconds in indentation (%d calls)' %
+                        logical_lines in stdout)
+        self.reset()
+
+        # The timings of the workers are merged
+        pep8style = pep8.StyleGuide(paths=[E11], benchmark=True, quiet=True,
+                                    jobs=2)
+        report = pep8style.check_files()
+        self.assertEqual(
+            sorted((name, calls) for name, (calls, _) in timings.items()),
+            sorted((name, calls) for name, (calls, _)
+                   in report.timings.items()))
+
+    def test_styleguide_skip_files(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            sources = [('large.py', 'x = 1\n' * 1000),
+                       ('binary.py', 'x = 1\n\x00\n'),
+                       ('generated.py', '#!/usr/bin/env python\n\n'
+                        '# @generated by a tool\nx=1\n'),
+                       ('docstring.py', '"""Not @generated."""\nx=1\n'),
+                       ('good.py', 'x=1\n')]
+            for name, source in sources:
+                with open(os.path.join(temp_dir, name), 'w') as f:
+                    f.write(source)
+            pep8style = pep8.StyleGuide(paths=[temp_dir], max_file_size=1000,
+                                        skip_binary=True,
+                                        skip_generated=['@generated'])
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'large.py')), 'larger than 1000 bytes')
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'binary.py')), 'binary')
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'generated.py')),
+                'generated (@generated)')
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'good.py')), None)
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'docstring.py')), None)
+
+            report = pep8style.check_files()
+            self.assertEqual(report.counters['files'], 2)
+            self.assertEqual(report.counters['skipped files'], 3)
+            self.assertEqual(report.total_errors, 2)
+            stdout = sys.stdout.getvalue()
+            self.assertTrue('good.py:1:2: E225 ' in stdout)
+            self.assertFalse('generated.py' in stdout)
+
+            # The markers can be given as a comma separated string
+            pep8style = pep8.StyleGuide(skip_generated='@spam,@generated')
+            self.assertEqual(pep8style.options.skip_generated,
+                             ('@spam', '@generated'))
+            self.assertEqual(pep8style.skipped(
+                os.path.join(temp_dir, 'generated.py')),
+                'generated (@generated)')
+
+            # The files are not skipped by default
+            self.reset()
+            report = pep8.StyleGuide(paths=[temp_dir]).check_files()
+            self.assertFalse('skipped files' in report.counters)
+            self.assertTrue(report.total_errors > 1)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_styleguide_file_timeout(self):
+        def check_slow(logical_line):
+            time.sleep(5 if 'slow' in logical_line else .01)
+            return []
+        pep8.register_check(check_slow, ['Z901'])
+        try:
+            lines = ['x = 1\n', 'y = (1,\n', '     slow)\n']
+            lines += ['z = 2\n'] * 20
+            pep8style = pep8.StyleGuide(file_timeout=.1, select=['Z9', 'E9'])
+
+            # The running check is interrupted
+            start = time.time()
+            report = pep8style.init_report()
+            pep8style.input_file('slow.py', lines=lines)
+            self.assertTrue(time.time() - start < 2)
+            self.assertEqual(report.total_errors, 1)
+            self.assertEqual(sys.stdout.getvalue().splitlines(), [
+                'slow.py:2:1: E903 TimeoutError: checks stopped after 0.1 '
+                'seconds in check_slow'])
+            self.reset()
+
+            # Outside of the main thread, the time is checked after each
+            # logical line
+            lines = ['z = 2\n'] * 40
+            thread = threading.Thread(target=pep8style.input_file,
+                                      args=('thread.py', lines))
+            thread.start()
+            thread.join()
+            self.assertEqual(report.total_errors, 2)
+            stdout = sys.stdout.getvalue()
+            self.assertTrue(stdout.startswith('thread.py:'))
+            self.assertTrue(stdout.rstrip().endswith(
+                ': E903 TimeoutError: checks stopped after 0.1 seconds'))
+        finally:
+            del pep8._checks['logical_line'][check_slow]
+
+    def test_styleguide_watch(self):
+        def write(path, source):
+            f = open(path, 'w')
+            f.write(source)
+            f.close()
+
+        main_thread = threading.current_thread()
+        e225 = 'E225 missing whitespace around operator'
+        for jobs, fmt, quiet in ((1, 'default', 0), (2, 'default', 0),
+                                 (1, 'jsonl', 0), (1, 'default', 1)):
+            temp_dir = tempfile.mkdtemp()
+            spam = os.path.join(temp_dir, 'spam.py')
+            eggs = os.path.join(temp_dir, 'eggs.py')
+            write(spam, 'a=1\n')
+            write(eggs, 'b = 1\n')
+            steps = [lambda: write(spam, 'b=2\na=1\n'),
+                     lambda: write(spam, 'a = 1\nb = 2\n'),
+                     lambda: write(eggs, 'import os, sys\n'),
+                     lambda: os.remove(eggs)]
+            outputs = []
+
+            def fake_sleep(interval):
+                if threading.current_thread() is not main_thread:
+                    # The threads of the pool of processes
+                    return saved_sleep(interval)
+                outputs.append(sys.stdout.getvalue().splitlines())
+                self.reset()
+                if not steps:
+                    raise KeyboardInterrupt
+                steps.pop(0)()
+            saved_sleep = pep8.time.sleep
+            pep8.time.sleep = fake_sleep
+            try:
+                report = pep8.StyleGuide(paths=[temp_dir], jobs=jobs,
+                                         format=fmt, quiet=quiet).watch()
+            finally:
+                pep8.time.sleep = saved_sleep
+                shutil.rmtree(temp_dir)
+
+            # Only the new errors, the fixed errors and the deleted files
+            if quiet:
+                self.assertEqual(outputs, [[]] * 5)
+            elif fmt == 'jsonl':
+                self.assertEqual(
+                    [[json.loads(line) for line in lines]
+                     for lines in outputs], [
+                        [{'path': spam, 'row': 1, 'col': 2, 'code': 'E225',
+                          'text': e225[5:],
+                          'check': 'missing_whitespace_around_operator'}],
+                        [{'path': spam, 'row': 1, 'col': 2, 'code': 'E225',
+                          'text': e225[5:],
+                          'check': 'missing_whitespace_around_operator'}],
+                        [{'path': spam, 'row': 1, 'col': 2, 'code': 'E225',
+                          'text': e225[5:], 'event': 'fixed'},
+                         {'path': spam, 'row': 2, 'col': 2, 'code': 'E225',
+                          'text': e225[5:], 'event': 'fixed'}],
+                        [{'path': eggs, 'row': 1, 'col': 10, 'code': 'E401',
+                          'text': 'multiple imports on one line',
+                          'check': 'imports_on_separate_lines'}],
+                        [{'path': eggs, 'event': 'deleted'}],
+                    ])
+            else:
+                self.assertEqual(outputs, [
+                    [spam + ':1:2: ' + e225],
+                    [spam + ':1:2: ' + e225],
+                    [spam + ':1:2: fixed ' + e225,
+                     spam + ':2:2: fixed ' + e225],
+                    [eggs + ':1:10: E401 multiple imports on one line'],
+                    [eggs + ': deleted'],
+                ])
+            self.assertFalse(sys.stdout)
+            self.assertEqual(sys.stderr, ['... stopped\n'])
+            self.assertEqual(report.counters['files'], 5)
+            self.assertEqual(report.total_errors, 3)
+            self.reset()
+
+    def test_serve(self):
+        if not hasattr(pep8.socket, 'AF_UNIX'):
+            return
+        temp_dir = tempfile.mkdtemp()
+        address = os.path.join(temp_dir, 'pep8.sock')
+        pep8style = pep8.StyleGuide()
+        server = threading.Thread(target=pep8.serve,
+                                  args=(pep8style, address))
+        server.start()
+        try:
+            for index in range(100):
+                if os.path.exists(address):
+                    break
+                time.sleep(.01)
+
+            total_errors = pep8.run_client(address, [E11])
+            self.assertEqual(total_errors, 4)
+            stdout = sys.stdout.getvalue()
+            self.assertEqual(len(stdout.splitlines()), 4)
+            self.assertTrue(stdout.startswith(E11 + ':3:3: E111 '))
+            self.reset()
+
+            saved_stdin_get_value = pep8.stdin_get_value
+            pep8.stdin_get_value = lambda: 'import os, sys\n'
+            try:
+                total_errors = pep8.run_client(address, ['-'])
+            finally:
+                pep8.stdin_get_value = saved_stdin_get_value
+            self.assertEqual(total_errors, 1)
+            self.assertEqual(sys.stdout.getvalue(),
+                             'stdin:1:10: E401 multiple imports on one line\n')
+            self.assertFalse(sys.stderr)
+            self.reset()
+
+            # A bad request does not stop the server
+            for request in ['{"cwd": "%s"}' % os.path.join(temp_dir, 'nope'),
+                            '{"paths": ', '[]']:
+                client = pep8.socket.socket(pep8.socket.AF_UNIX)
+                client.connect(address)
+                client.sendall(request.encode('utf-8'))
+                client.shutdown(pep8.socket.SHUT_WR)
+                response = json.loads(pep8._recv_all(client).decode('utf-8'))
+                client.close()
+                self.assertEqual(list(response), ['error'])
+            self.assertEqual(pep8.run_client(address, [E11]), 4)
+
+            # The socket of a running server is kept
+            self.assertRaises(pep8.socket.error, pep8.serve,
+                              pep8style, address)
+            self.assertTrue(os.path.exists(address))
+            self.assertEqual(os.stat(address).st_mode & 0o777, 0o600)
+
+            # A silent client does not block the next requests
+            saved_timeout = pep8.SERVE_TIMEOUT
+            pep8.SERVE_TIMEOUT = .05
+            silent = pep8.socket.socket(pep8.socket.AF_UNIX)
+            try:
+                silent.connect(address)
+                self.assertEqual(pep8.run_client(address, [E11]), 4)
+            finally:
+                silent.close()
+                pep8.SERVE_TIMEOUT = saved_timeout
+        finally:
+            client = pep8.socket.socket(pep8.socket.AF_UNIX)
+            client.connect(address)
+            client.sendall('{"stop": true}'.encode('utf-8'))
+            client.close()
+            server.join()
+            shutil.rmtree(temp_dir)
+        self.assertFalse(os.path.exists(address))
+        self.assertRaises(pep8.socket.error, pep8.run_client, address, [E11])
+
+    def test_checker_recheck(self):
+        pep8style = pep8.StyleGuide(quiet=True)
+        lines = pep8.readlines(E11)
+        lines = [line for line in lines if not line.startswith('#:')]
+        lines = lines * 3
+
+        def check(lines, *args):
+            report = pep8.ResultReport(pep8style.options)
+            checker = pep8.Checker(lines=lines, options=pep8style.options,
+                                   report=report)
+            if not args:
+                checker.check_all()
+                return sorted(result[:3] for result in report.results)
+            state = checker.recheck(lines, *args)
+            self.assertEqual(report.counters['logical lines'],
+                             len(state.checkpoints))
+            return sorted(result[:3] for result in report.results), state
+
+        results, state = check(lines, None, None)
+        self.assertEqual(results, check(lines))
+        self.assertTrue(results)
+
+        edits = [
+            (len(lines) // 2, ['x  = 1\n'], None),
+            (7, ['if True:\n', '  y = (1,\n', '2)\n'], None),
+            (20, [], None),
+            (len(lines) - 1, ['\n', '\n'], None),
+            (3, ['z = [\n'], None),
+            (3, [], [(4, 4)]),
+        ]
+        for (row, new, changed_ranges) in edits:
+            lines = lines[:row] + new + lines[row + 1:]
+            results, state = check(lines, changed_ranges, state)
+            self.assertEqual(results, check(lines))
+            self.assertEqual(state.lines, lines)
+
     def test_check_unicode(self):
         # Do not crash if lines are Unicode (Python 2.x)
         pep8.register_check(DummyChecker, ['Z701'])
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import json
 import os.path
+import shutil
+import subprocess
 import sys
+import tempfile
 import unittest
 
 import pep8
@@ -101,6 +105,66 @@ class ShellTestCase(unittest.TestCase):
         self.assertEqual(stdout,
                          ['stdin:1:10: E401 multiple imports on one line'])
 
+    def test_check_jsonl(self):
+        E11 = os.path.join(ROOT_DIR, 'testsuite', 'E11.py')
+        stdout, stderr, errcode = self.pep8('--format=jsonl', E11)
+        self.assertEqual(errcode, 1)
+        self.assertFalse(stderr)
+        results = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0], {
+            'path': E11, 'row': 3, 'col': 3, 'code': 'E111',
+            'text': 'indentation is not a multiple of four',
+            'check': 'indentation'})
+        self.assertEqual([(r['row'], r['code']) for r in results],
+                         [(3, 'E111'), (6, 'E111'), (9, 'E112'), (12, 'E113')])
+
+    def test_check_fail_fast(self):
+        E11 = os.path.join(ROOT_DIR, 'testsuite', 'E11.py')
+        E12 = os.path.join(ROOT_DIR, 'testsuite', 'E12.py')
+        stdout, stderr, errcode = self.pep8('--fail-fast', E11, E12)
+        self.assertEqual(errcode, 1)
+        self.assertFalse(stderr)
+        self.assertEqual(stdout.splitlines(), [
+            E11 + ':3:3: E111 indentation is not a multiple of four'])
+
+        stdout, stderr, errcode = self.pep8('--max-errors=3', E11, E12)
+        self.assertEqual(errcode, 1)
+        self.assertEqual([line[len(E11):] for line in stdout.splitlines()],
+                         [':3:3: E111 indentation is not a multiple of four',
+                          ':6:6: E111 indentation is not a multiple of four',
+                          ':9:1: E112 expected an indented block'])
+
+        testsuite = os.path.join(ROOT_DIR, 'testsuite')
+        for jobs in ('1', '2'):
+            stdout, stderr, errcode = self.pep8('--max-errors=2',
+                                                '--jobs', jobs, testsuite)
+            self.assertEqual(errcode, 1)
+            self.assertEqual(len(stdout.splitlines()), 2)
+            self.assertEqual(len(set(line.split(':')[0]
+                                     for line in stdout.splitlines())), 1)
+
+        stdout, stderr, errcode = self.pep8('--max-errors=5', '--count',
+                                            E11, E12)
+        self.assertEqual(errcode, 1)
+        self.assertEqual(stderr, '5\n')
+        self.assertEqual(len(stdout.splitlines()), 5)
+        self.assertTrue(stdout.splitlines()[-1].startswith(E12 + ':'))
+
+    def test_check_client(self):
+        address = os.path.join(ROOT_DIR, 'testsuite', 'nope.sock')
+        E11 = os.path.join(ROOT_DIR, 'testsuite', 'E11.py')
+        stdout, stderr, errcode = self.pep8('--client', address, E11)
+        self.assertEqual(errcode, 2)
+        self.assertFalse(stdout)
+        self.assertTrue(stderr.startswith('pep8: %s: ' % address))
+
+        # The options of the server apply
+        stdout, stderr, errcode = self.pep8('--client', address,
+                                            '--select=E1', E11)
+        self.assertEqual(errcode, 2)
+        self.assertTrue('--select cannot be used with --client' in stderr)
+
     def test_check_non_existent(self):
         self.stdin = 'import os, sys\n'
         stdout, stderr, errcode = self.pep8('fictitious.py')
@@ -145,6 +209,16 @@ class ShellTestCase(unittest.TestCase):
             self.assertEqual(y, str(col))
             self.assertTrue(msg.startswith(' E11'))
 
+        # The changed lines are filtered in the JSON output too
+        stdout, stderr, errcode = self.pep8('--diff', '--format=jsonl')
+        self.assertEqual(errcode, 1)
+        self.assertFalse(stderr)
+        errors = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual([(e['path'], e['row'], e['col'], e['code'])
+                          for e in errors],
+                         [('./testsuite/E11.py', 3, 3, 'E111'),
+                          ('./testsuite/E11.py', 6, 6, 'E111')])
+
         diff_lines[:2] = ["--- a/testsuite/E11.py	2006-06-01 08:49 +0400",
                           "+++ b/testsuite/E11.py	2008-04-06 17:36 +0400"]
         self.stdin = '\n'.join(diff_lines)
@@ -186,3 +260,70 @@ class ShellTestCase(unittest.TestCase):
         self.assertFalse(errcode)
         self.assertFalse(stdout)
         self.assertFalse(stderr)
+
+    def test_check_changed_since(self):
+        pep8.PROJECT_CONFIG = ()
+        saved_cwd = os.getcwd()
+        temp_dir = tempfile.mkdtemp()
+        quoted_names = ['a b.py', 'q"t.py', 'té.py']
+
+        def git(*args):
+            return subprocess.call(
+                ('git', '-c', 'user.name=pep8', '-c', 'user.email=pep8@test')
+                + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def write(path, source):
+            f = open(path, 'w')
+            f.write(source)
+            f.close()
+        try:
+            os.chdir(temp_dir)
+            try:
+                if git('init', '-q'):
+                    return
+            except OSError:     # git is not installed
+                return
+            os.mkdir('sub')
+            write(os.path.join('sub', 'spam.py'), 'a=1\nb = 2\n')
+            write('eggs.py', 'x = 1\n')
+            for name in quoted_names:
+                write(name, 'x = 1\n')
+            git('add', '.')
+            git('commit', '-q', '-m', 'initial')
+            write(os.path.join('sub', 'spam.py'), 'a=1\nb=2\nc = 3\n')
+            write('eggs.py', 'x=1\n')
+            write('ham.py', 'y=1\n')   # untracked
+
+            stdout, stderr, errcode = self.pep8('--changed-since', 'HEAD')
+            self.assertEqual(errcode, 1)
+            self.assertFalse(stderr)
+            self.assertEqual(stdout.splitlines(), [
+                './eggs.py:1:2: E225 missing whitespace around operator',
+                './sub/spam.py:2:2: E225 missing whitespace around operator'])
+
+            # The names with a space, a quote or non-ASCII characters
+            for name in quoted_names:
+                write(name, 'x=1\n')
+            stdout, stderr, errcode = self.pep8('--changed-since', 'HEAD')
+            self.assertEqual(errcode, 1)
+            self.assertFalse(stderr)
+            self.assertEqual(sorted(stdout.splitlines()), sorted(
+                ['./%s:%d:2: E225 missing whitespace around operator' % entry
+                 for entry in [('eggs.py', 1), ('sub/spam.py', 2)] +
+                 [(name, 1) for name in quoted_names]]))
+            for name in quoted_names:
+                write(name, 'x = 1\n')
+
+            stdout, stderr, errcode = self.pep8('--changed-since', 'HEAD',
+                                                'sub')
+            self.assertEqual(errcode, 1)
+            self.assertEqual(stdout.splitlines(), [
+                './sub/spam.py:2:2: E225 missing whitespace around operator'])
+
+            stdout, stderr, errcode = self.pep8('--changed-since', 'nope')
+            self.assertEqual(errcode, 2)
+            self.assertFalse(stdout)
+            self.assertTrue('pep8: error: --changed-since: ' in stderr)
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(temp_dir)